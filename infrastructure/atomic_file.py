@@ -0,0 +1,74 @@
+"""
+Atomic, lock-protected updates of small JSON files.
+
+Files that several processes read-modify-write (the operator message queue
+written by the dashboard and drained by the harness) go through
+atomic_update(): an exclusive flock on a sidecar `<name>.lock` file
+serializes writers, and the new content is written to a temporary file and
+moved into place with os.replace(), so readers never see a partial file
+and no writer's update is lost.
+"""
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write a file so readers never observe a partial write."""
+    tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}.{threading.get_ident()}")
+    try:
+        with tmp.open("w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock for `path`, held on a sidecar file that is never replaced."""
+    # Locking `path` itself would not work: os.replace() swaps in a new inode
+    fd = os.open(path.with_name(f"{path.name}.lock"), os.O_RDWR | os.O_CREAT, 0o664)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # also releases the lock
+
+
+def read_json(path: Path, default: Callable[[], Any] = dict) -> Any:
+    """Parse a JSON file, or return `default()` if it is missing or unreadable."""
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default()
+
+
+def atomic_update(path: Path, fn: Callable[[Any], T], default: Callable[[], Any] = dict) -> T:
+    """Apply `fn` to the parsed content of `path` under an exclusive lock.
+
+    `fn` mutates the data in place; its return value is passed through. The
+    file is rewritten (atomically) only if the content actually changed.
+    """
+    with file_lock(path):
+        try:
+            original = path.read_text()
+            data = json.loads(original)
+        except (FileNotFoundError, json.JSONDecodeError):
+            original, data = None, default()
+
+        result = fn(data)
+
+        text = json.dumps(data, indent=2)
+        if text != original:
+            write_atomic(path, text)
+        return result
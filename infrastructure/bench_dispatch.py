@@ -0,0 +1,123 @@
+"""
+Micro-benchmark for the SDK message dispatcher.
+
+Pushes synthetic SDK-shaped messages through dispatch.MESSAGES and reports
+messages per second. Needs no SDK install or credentials:
+
+    python bench_dispatch.py [--messages 200000] [--payload 20000]
+"""
+
+import argparse
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from dispatch import MESSAGES
+from telemetry import IterationMetrics
+
+
+# Synthetic stand-ins named like the SDK classes (dispatch matches by name)
+
+@dataclass
+class TextBlock:
+    text: str
+
+
+@dataclass
+class ToolUseBlock:
+    id: str
+    name: str
+    input: dict[str, Any]
+
+
+@dataclass
+class ToolResultBlock:
+    tool_use_id: str
+    content: Any = None
+    is_error: bool | None = None
+
+
+@dataclass
+class AssistantMessage:
+    content: list[Any]
+
+
+@dataclass
+class UserMessage:
+    content: Any
+
+
+@dataclass
+class SystemMessage:
+    subtype: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ResultMessage:
+    total_cost_usd: float | None = None
+
+
+@dataclass
+class RawEvent:
+    type: str
+    subtype: str = ""
+
+
+class NullState:
+    """Just enough of HarnessState for the handlers."""
+
+    def __init__(self):
+        self.logs: deque = deque(maxlen=100)
+        self.metrics = IterationMetrics()
+
+    def log(self, message: str, kind: str = "") -> None:
+        self.logs.append((kind, message))
+
+
+def build_messages(payload: int) -> list[Any]:
+    """A representative mix: text, tool calls with large inputs, results."""
+    big = "x" * payload
+    return [
+        SystemMessage("init"),
+        AssistantMessage([TextBlock("Let me look at the harness.")]),
+        AssistantMessage([ToolUseBlock("t1", "Read", {"file_path": "/bob/infrastructure/harness.py"})]),
+        UserMessage([ToolResultBlock("t1", big)]),
+        AssistantMessage([ToolUseBlock("t2", "Write", {"file_path": "/bob/notes.md", "content": big})]),
+        UserMessage([ToolResultBlock("t2", [{"type": "text", "text": big}])]),
+        RawEvent("system", "ping"),
+        ResultMessage(total_cost_usd=0.0123),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200_000, help="Messages to dispatch")
+    parser.add_argument("--payload", type=int, default=20_000, help="Size of tool inputs/results")
+    args = parser.parse_args()
+
+    sample = build_messages(args.payload)
+    state = NullState()
+    dispatch = MESSAGES.dispatch
+
+    # Warm the type cache
+    for message in sample:
+        dispatch(message, state)
+
+    rounds = max(1, args.messages // len(sample))
+    start = time.perf_counter()
+    for i in range(rounds):
+        if i % 100 == 0:
+            state.metrics = IterationMetrics()  # one "iteration" per 100 rounds
+        for message in sample:
+            dispatch(message, state)
+    elapsed = time.perf_counter() - start
+
+    total = rounds * len(sample)
+    print(f"Dispatched {total:,} messages ({args.payload:,}-char payloads) in {elapsed:.3f}s")
+    print(f"  {total / elapsed:,.0f} messages/s, {elapsed / total * 1e6:.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Unix-socket pub/sub broker for messages between instances.
+
+The multi-instance orchestrator hosts a Broker on `.broker.sock` in the
+workspace. Clients speak newline-delimited JSON:
+
+    -> {"op": "subscribe", "topics": ["broadcast", "instance_2"], "after": 41}
+    <- {"op": "message", "message": {"seq": 42, "from": ..., "to": ..., ...}}
+    -> {"op": "publish", "from": "instance_1", "to": "tasks", "type": ..., "content": ...}
+    <- {"op": "published", "seq": 43}
+
+A message's topic is its recipient: "broadcast", an instance id, "tasks" or
+"questions" ("*" subscribes to everything). Every published message is
+written to the shared store first, which makes the messages table the
+durable log: a subscriber passes the last seq it saw and gets the backlog
+replayed before live messages. The broker also tails the store, so writers
+that bypassed it (the fallback path) still reach subscribers.
+
+When the broker is not running, publish() writes to the store directly and
+follow() polls the store, so everything keeps working, only with polling
+latency.
+"""
+
+import asyncio
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from shared_store import SharedStore
+
+
+SOCKET_NAME = ".broker.sock"
+
+# Topics besides "broadcast" and instance ids
+TASKS = "tasks"
+QUESTIONS = "questions"
+ALL = "*"
+
+# How often the broker looks for messages written to the store behind its back
+TAIL_INTERVAL = 1.0
+
+# Messages buffered for a subscriber before it is considered stuck and dropped
+SUBSCRIBER_BUFFER = 1000
+
+# Backlog replayed per store query
+REPLAY_BATCH = 1000
+
+# Longest line either side reads (asyncio's default is 64 KiB, less than a long message)
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+def socket_path(workspace: Path | str | None = None) -> Path:
+    return Path(workspace or os.environ.get("BOB_WORKSPACE", "/bob")) / SOCKET_NAME
+
+
+def _encode(payload: dict[str, Any]) -> bytes:
+    return (json.dumps(payload) + "\n").encode()
+
+
+class _Subscriber:
+    def __init__(self, topics: set[str], writer: asyncio.StreamWriter):
+        self.topics = topics
+        self.writer = writer
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(SUBSCRIBER_BUFFER)
+        self.last_seq = 0
+
+    def wants(self, message: dict[str, Any]) -> bool:
+        return ALL in self.topics or message["to"] in self.topics
+
+
+class Broker:
+    """Fans messages out to subscribers, persisting each one in the shared store."""
+
+    def __init__(self, store: SharedStore, path: Path):
+        self.store = store
+        self.path = path
+        self._server: asyncio.AbstractServer | None = None
+        self._subscribers: set[_Subscriber] = set()
+        self._handlers: set[asyncio.Task] = set()
+        # Serializes persist+fan-out against replay+register, so a subscriber
+        # never misses or duplicates a message published while it joins
+        self._lock = asyncio.Lock()
+        self._last_seq = 0
+        self._tail_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self.path.unlink(missing_ok=True)  # stale socket from a previous run
+        self._last_seq = await asyncio.to_thread(self.store.last_message_seq)
+        self._server = await asyncio.start_unix_server(
+            self._handle, path=str(self.path), limit=LINE_LIMIT
+        )
+        os.chmod(self.path, 0o666)  # instances may run as a different user than the orchestrator
+        self._tail_task = asyncio.create_task(self._tail())
+
+    async def close(self) -> None:
+        if self._tail_task:
+            self._tail_task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        # Let connection handlers finish rather than be cancelled mid-read
+        for task in self._handlers:
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        self.path.unlink(missing_ok=True)
+
+    def _fan_out(self, message: dict[str, Any]) -> None:
+        self._last_seq = max(self._last_seq, message["seq"])
+        for subscriber in list(self._subscribers):
+            if not subscriber.wants(message) or message["seq"] <= subscriber.last_seq:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+                subscriber.last_seq = message["seq"]
+            except asyncio.QueueFull:
+                # Stuck reader: drop it; it resumes from its last seq on reconnect
+                self._subscribers.discard(subscriber)
+                subscriber.writer.close()
+
+    async def _tail(self) -> None:
+        while True:
+            await asyncio.sleep(TAIL_INTERVAL)
+            async with self._lock:
+                missed = await asyncio.to_thread(self.store.messages_for, None, self._last_seq)
+                for message in missed:
+                    self._fan_out(message)
+
+    async def _publish(self, request: dict[str, Any]) -> dict[str, Any]:
+        async with self._lock:
+            message = await asyncio.to_thread(
+                self.store.post_message,
+                request["from"], request.get("to", "broadcast"), request.get("type", "info"),
+                request["content"], request.get("metadata"),
+            )
+            # Anything written directly to the store since our last look goes out first
+            if message["seq"] > self._last_seq + 1:
+                missed = await asyncio.to_thread(self.store.messages_for, None, self._last_seq)
+                for earlier in missed:
+                    if earlier["seq"] < message["seq"]:
+                        self._fan_out(earlier)
+            self._fan_out(message)
+        return {"op": "published", "seq": message["seq"]}
+
+    async def _subscribe(self, request: dict[str, Any], writer: asyncio.StreamWriter) -> _Subscriber:
+        topics = set(request.get("topics") or [ALL])
+        recipients = None if ALL in topics else tuple(topics)
+        subscriber = _Subscriber(topics, writer)
+        subscriber.last_seq = int(request.get("after", 0))
+
+        async with self._lock:
+            # Replay the durable log, then go live
+            while True:
+                backlog = await asyncio.to_thread(
+                    self.store.messages_for, recipients, subscriber.last_seq, REPLAY_BATCH
+                )
+                for message in backlog:
+                    writer.write(_encode({"op": "message", "message": message}))
+                    subscriber.last_seq = message["seq"]
+                await writer.drain()
+                if len(backlog) < REPLAY_BATCH:
+                    break
+            subscriber.last_seq = max(subscriber.last_seq, self._last_seq)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    async def _push(self, subscriber: _Subscriber) -> None:
+        while True:
+            message = await subscriber.queue.get()
+            subscriber.writer.write(_encode({"op": "message", "message": message}))
+            await subscriber.writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscriber: _Subscriber | None = None
+        pusher: asyncio.Task | None = None
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # Oversized request: asyncio has discarded it; report and carry on
+                    writer.write(_encode({"op": "error", "error": "request too large"}))
+                    continue
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                    if op == "publish":
+                        writer.write(_encode(await self._publish(request)))
+                        await writer.drain()
+                    elif op == "subscribe" and subscriber is None:
+                        subscriber = await self._subscribe(request, writer)
+                        pusher = asyncio.create_task(self._push(subscriber))
+                    else:
+                        writer.write(_encode({"op": "error", "error": f"unexpected op: {op}"}))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    writer.write(_encode({"op": "error", "error": str(e)}))
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # client went away, or the broker is closing
+        finally:
+            self._handlers.discard(handler)
+            if subscriber is not None:
+                self._subscribers.discard(subscriber)
+            if pusher is not None:
+                pusher.cancel()
+            writer.close()
+
+
+def publish(store: SharedStore, sender: str, to: str, msg_type: str, content: str,
+            metadata: dict[str, Any] | None = None, path: Path | None = None,
+            timeout: float = 2.0) -> dict[str, Any]:
+    """Post a message through the broker, or straight to the store if it is not running.
+
+    Blocking, for tools and other synchronous callers. Returns the posted
+    record (with its seq) either way; the seq is None if the broker took the
+    message but its reply was lost.
+    """
+    path = path or store.path.parent / SOCKET_NAME
+    request = {"op": "publish", "from": sender, "to": to, "type": msg_type,
+               "content": content, "metadata": metadata or {}}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(path))
+            sock.sendall(_encode(request))
+        except OSError:
+            # No broker: the store is the fallback path
+            return store.post_message(sender, to, msg_type, content, metadata)
+        try:
+            seq = json.loads(sock.makefile("rb").readline())["seq"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            # The broker may already have posted it; posting again would duplicate it
+            seq = None
+    return {"seq": seq, "to": to, "type": msg_type, "content": content,
+            "from": sender, "metadata": metadata or {}}
+
+
+async def follow(store: SharedStore, topics: list[str], after: int = 0,
+                 path: Path | None = None, poll_interval: float = 2.0,
+                 max_poll_interval: float | None = None) -> AsyncIterator[dict[str, Any]]:
+    """Yield messages on `topics` with a seq above `after`, forever.
+
+    Pushed by the broker when it is running; otherwise the store is polled
+    and the broker is retried. Polls start every `poll_interval` seconds and,
+    with `max_poll_interval`, back off exponentially up to it while nothing
+    arrives.
+    """
+    path = path or store.path.parent / SOCKET_NAME
+    recipients = None if ALL in topics else tuple(topics)
+    interval = poll_interval
+    while True:
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(path), limit=LINE_LIMIT)
+        except OSError:
+            messages = await asyncio.to_thread(store.messages_for, recipients, after)
+            for message in messages:
+                after = message["seq"]
+                yield message
+            await asyncio.sleep(interval)
+            if messages or max_poll_interval is None:
+                interval = poll_interval
+            else:
+                interval = min(interval * 2, max_poll_interval)
+            continue
+
+        interval = poll_interval
+        try:
+            writer.write(_encode({"op": "subscribe", "topics": topics, "after": after}))
+            await writer.drain()
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # A message too long for the stream: read it (and anything
+                    # else missed) from the store, then carry on with the socket
+                    for message in await asyncio.to_thread(store.messages_for, recipients, after):
+                        after = message["seq"]
+                        yield message
+                    continue
+                if not line:
+                    break
+                event = json.loads(line)
+                if event.get("op") == "message" and event["message"]["seq"] > after:
+                    after = event["message"]["seq"]
+                    yield event["message"]
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            writer.close()
+        # Broker went away: fall through to reconnect or poll
@@ -4,24 +4,39 @@ Bob's Dashboard Server
 A simple web interface for monitoring and controlling the autonomous harness.
 """
 
+import asyncio
 import json
+import os
+import sys
+import time
 from pathlib import Path
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from atomic_file import atomic_update, read_json  # noqa: E402
+from broker import ALL, follow, publish  # noqa: E402
+from shared_store import DB_NAME, SharedStore  # noqa: E402
+from state_journal import load_state  # noqa: E402
+from telemetry import aggregate, read_recent, tail_lines  # noqa: E402
+
 
 BOB_WORKSPACE = Path("/bob")
 STATE_FILE = BOB_WORKSPACE / ".harness_state.json"
+METRICS_FILE = BOB_WORKSPACE / ".harness_metrics.jsonl"
 MESSAGE_FILE = BOB_WORKSPACE / ".harness_messages.json"
 STOP_FILE = BOB_WORKSPACE / "stop-autonomous"
-INSTANCE_REGISTRY = BOB_WORKSPACE / ".instance_registry.json"
-SHARED_MESSAGES = BOB_WORKSPACE / ".shared_messages.json"
+SHARED_DB = BOB_WORKSPACE / DB_NAME
+
+# Log lines shown per state; matches what the harness keeps
+LOG_RETENTION = int(os.environ.get("BOB_LOG_RETENTION", "100"))
 
 
 app = FastAPI(title="Bob Dashboard")
+store = SharedStore(SHARED_DB)
 templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
 
 
@@ -35,12 +50,10 @@ class SharedMessageRequest(BaseModel):
 
 
 def get_state() -> dict:
-    """Load harness state."""
+    """Load harness state (checkpoint plus journal)."""
     if STATE_FILE.exists():
-        try:
-            return json.loads(STATE_FILE.read_text())
-        except (json.JSONDecodeError, KeyError):
-            pass
+        data, _, _ = load_state(STATE_FILE, log_tail=LOG_RETENTION)
+        return data
 
     return {
         "running": False,
@@ -53,27 +66,12 @@ def get_state() -> dict:
 
 def get_pending_messages() -> list[str]:
     """Get pending messages for Bob."""
-    if MESSAGE_FILE.exists():
-        try:
-            data = json.loads(MESSAGE_FILE.read_text())
-            return data.get("messages", [])
-        except (json.JSONDecodeError, KeyError):
-            pass
-    return []
+    return read_json(MESSAGE_FILE).get("messages", [])
 
 
 def send_message(message: str) -> None:
-    """Queue a message for Bob."""
-    if MESSAGE_FILE.exists():
-        try:
-            data = json.loads(MESSAGE_FILE.read_text())
-        except (json.JSONDecodeError, KeyError):
-            data = {"messages": []}
-    else:
-        data = {"messages": []}
-
-    data["messages"].append(message)
-    MESSAGE_FILE.write_text(json.dumps(data, indent=2))
+    """Queue a message for Bob (locked, so it cannot race the harness draining the queue)."""
+    atomic_update(MESSAGE_FILE, lambda data: data.setdefault("messages", []).append(message))
 
 
 def request_stop() -> None:
@@ -137,35 +135,48 @@ async def piece(request: Request, piece_id: str):
     )
 
 
+def get_instances() -> list[dict]:
+    """Registered instances; empty when multi-instance mode has never run."""
+    if not SHARED_DB.exists():
+        return []
+    return store.instances()
+
+
 @app.get("/api/state")
 async def api_state():
     """API endpoint for state (for polling)."""
     # Check if multi-instance mode
-    if INSTANCE_REGISTRY.exists():
+    registry = get_instances()
+    if registry:
         # Return all instance states
-        try:
-            registry = json.loads(INSTANCE_REGISTRY.read_text())
-            instances = []
-
-            for inst in registry.get("instances", []):
-                instance_id = inst["instance_id"]
-                instance_file = BOB_WORKSPACE / f".instance_{instance_id}_state.json"
-
-                if instance_file.exists():
-                    try:
-                        inst_state = json.loads(instance_file.read_text())
-                        instances.append(inst_state)
-                    except (json.JSONDecodeError, KeyError):
-                        instances.append(inst)
-                else:
-                    instances.append(inst)
-
-            return {
-                "multi_instance": True,
-                "instances": instances,
-            }
-        except (json.JSONDecodeError, KeyError):
-            pass
+        instances = []
+
+        for inst in registry:
+            instance_id = inst["instance_id"]
+            instance_file = BOB_WORKSPACE / f".instance_{instance_id}_state.json"
+
+            if instance_file.exists():
+                inst_state, _, _ = load_state(instance_file, log_tail=LOG_RETENTION)
+                if "instance_id" not in inst_state:
+                    inst_state = inst
+            else:
+                inst_state = inst
+
+            # The state file says what the harness last wrote; heartbeats say
+            # whether it is still alive to write anything
+            alive = inst["status"] in ("starting", "running")
+            instances.append({
+                **inst_state,
+                "running": bool(inst_state.get("running", alive)) and alive,
+                "liveness": inst["status"],
+                "heartbeat_age": inst["heartbeat_age"],
+                "rss_kb": inst["rss_kb"],
+            })
+
+        return {
+            "multi_instance": True,
+            "instances": instances,
+        }
 
     # Single instance mode
     return {
@@ -174,6 +185,57 @@ async def api_state():
     }
 
 
+@app.get("/api/instance-output/{instance_id}")
+async def api_instance_output(instance_id: str, lines: int = 200):
+    """Tail of an instance's process output (stdout/stderr captured by the orchestrator)."""
+    if instance_id not in {inst["instance_id"] for inst in get_instances()}:
+        return {"instance_id": instance_id, "lines": [], "error": "Unknown instance"}
+    log_file = BOB_WORKSPACE / f".instance_{instance_id}.log"
+    return {"instance_id": instance_id, "lines": tail_lines(log_file, min(lines, 2000))}
+
+
+@app.get("/api/resources")
+async def api_resources(minutes: int = 30):
+    """Per-instance resource time series (CPU %, RSS, fds, threads) sampled by the orchestrator."""
+    if not SHARED_DB.exists():
+        return {"instances": {}}
+    roles = {inst["instance_id"]: inst["role"] for inst in get_instances()}
+    series = store.resource_samples(time.time() - minutes * 60)
+    return {
+        "instances": {
+            instance_id: {"role": roles.get(instance_id, "unknown"), "samples": samples}
+            for instance_id, samples in series.items()
+        }
+    }
+
+
+@app.get("/api/metrics")
+async def api_metrics(window: int = 20):
+    """Rolling aggregates over the last `window` iterations."""
+    window = max(1, min(window, 1000))
+
+    registry = get_instances()
+    if registry:
+        instances = {}
+        for inst in registry:
+            instance_id = inst["instance_id"]
+            metrics_file = BOB_WORKSPACE / f".instance_{instance_id}_metrics.jsonl"
+            records = read_recent(metrics_file, window)
+            instances[instance_id] = {
+                "aggregate": aggregate(records),
+                "last": records[-1] if records else None,
+            }
+        return {"multi_instance": True, "window": window, "instances": instances}
+
+    records = read_recent(METRICS_FILE, window)
+    return {
+        "multi_instance": False,
+        "window": window,
+        "aggregate": aggregate(records),
+        "last": records[-1] if records else None,
+    }
+
+
 @app.get("/api/stop-status")
 async def api_stop_status():
     """API endpoint for stop signal status."""
@@ -211,41 +273,33 @@ async def api_clear_stop():
 @app.get("/api/shared-messages")
 async def api_shared_messages():
     """Get shared messages between instances."""
-    if not SHARED_MESSAGES.exists():
-        return {"messages": []}
-
-    try:
-        data = json.loads(SHARED_MESSAGES.read_text())
-        # Return last 50 messages
-        return {"messages": data.get("messages", [])[-50:]}
-    except (json.JSONDecodeError, KeyError):
+    if not SHARED_DB.exists():
         return {"messages": []}
+    # Return last 50 messages
+    return {"messages": store.recent_messages(50)}
 
 
 @app.post("/api/shared-message")
 async def api_send_shared_message(request: SharedMessageRequest):
     """Send a message to the shared chat."""
-    from datetime import datetime
-
     if not request.message.strip():
         return {"success": False, "error": "Empty message"}
 
-    if SHARED_MESSAGES.exists():
-        try:
-            data = json.loads(SHARED_MESSAGES.read_text())
-        except (json.JSONDecodeError, KeyError):
-            data = {"messages": []}
-    else:
-        data = {"messages": []}
-
-    data["messages"].append({
-        "from": request.sender,
-        "to": "broadcast",
-        "type": "human",
-        "content": request.message.strip(),
-        "timestamp": datetime.now().isoformat(),
-        "metadata": {},
-    })
-
-    SHARED_MESSAGES.write_text(json.dumps(data, indent=2))
+    # publish() blocks on the broker socket (or the store), so keep it off the event loop
+    await asyncio.to_thread(
+        publish, store, request.sender, "broadcast", "human", request.message.strip()
+    )
     return {"success": True}
+
+
+@app.get("/api/shared-messages/stream")
+async def api_shared_messages_stream(request: Request, after: int = 0):
+    """Server-sent events: every shared message with a seq above `after`, as it is posted."""
+    # EventSource reconnects with the id of the last event it received
+    after = int(request.headers.get("last-event-id") or after)
+
+    async def events():
+        async for message in follow(store, [ALL], after):
+            yield f"id: {message['seq']}\ndata: {json.dumps(message)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,227 @@
+"""
+Table-driven handling of SDK messages.
+
+Messages and content blocks are routed to handlers registered by class
+name, so they match no matter which module the SDK class comes from. The
+handler for each concrete class is resolved once and cached; objects that
+only expose a raw `type` attribute are routed by that value instead.
+
+New message kinds are supported by registering a handler:
+
+    @MESSAGES.handles("StreamEvent")
+    def handle_stream_event(message, state):
+        ...
+"""
+
+import json
+from typing import Any, Callable
+
+from telemetry import payload_bytes
+
+
+# Characters of tool input / result kept in log previews
+PREVIEW_LIMIT = 500
+
+Handler = Callable[[Any, Any], None]
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class _BoundedWriter:
+    """Collects text until a character budget is used up."""
+
+    def __init__(self, limit: int):
+        self.parts: list[str] = []
+        self.remaining = limit
+
+    def write(self, text: str) -> None:
+        if len(text) > self.remaining:
+            self.parts.append(text[:self.remaining])
+            raise _BudgetExhausted
+        self.parts.append(text)
+        self.remaining -= len(text)
+
+
+def _encode(value: Any, out: _BoundedWriter) -> None:
+    """Write `value` as JSON, never encoding more than the budget allows."""
+    if isinstance(value, str):
+        # Only the part of a long string that can still fit gets escaped
+        out.write(json.dumps(value[:out.remaining + 1]))
+    elif isinstance(value, dict):
+        out.write("{")
+        for i, (key, item) in enumerate(value.items()):
+            out.write(", " if i else "")
+            out.write(json.dumps(str(key)[:out.remaining + 1]) + ": ")
+            _encode(item, out)
+        out.write("}")
+    elif isinstance(value, (list, tuple)):
+        out.write("[")
+        for i, item in enumerate(value):
+            out.write(", " if i else "")
+            _encode(item, out)
+        out.write("]")
+    elif value is None or isinstance(value, (bool, int, float)):
+        out.write(json.dumps(value))
+    else:
+        _encode(str(value), out)
+
+
+def preview(value: Any, limit: int = PREVIEW_LIMIT) -> str:
+    """Short text preview of a tool input or result for the logs.
+
+    Strings are cut as-is; structures are encoded as JSON only until the
+    limit is reached, so the cost depends on the preview size rather than
+    on the size of the payload (e.g. a whole file passed to Write).
+    """
+    if isinstance(value, str):
+        return value[:limit] + "..." if len(value) > limit else value
+
+    out = _BoundedWriter(limit)
+    try:
+        _encode(value, out)
+    except _BudgetExhausted:
+        return "".join(out.parts) + "..."
+    return "".join(out.parts)
+
+
+class MessageDispatcher:
+    """Routes objects to handlers by class name (cached) or raw `type`."""
+
+    def __init__(self, default: Handler, kind_default: Handler | None = None):
+        self.default = default
+        self.kind_default = kind_default or default
+        self._by_name: dict[str, Handler] = {}
+        self._by_kind: dict[str, Handler] = {}
+        self._cache: dict[type, Handler] = {}
+
+    def register(self, name: str, handler: Handler) -> None:
+        """Handle instances of the class called `name` (or its subclasses)."""
+        self._by_name[name] = handler
+        self._cache.clear()
+
+    def register_kind(self, kind: str, handler: Handler) -> None:
+        """Handle unregistered classes whose `type` attribute equals `kind`."""
+        self._by_kind[kind] = handler
+
+    def handles(self, *names: str) -> Callable[[Handler], Handler]:
+        """Decorator form of register()."""
+        def decorator(handler: Handler) -> Handler:
+            for name in names:
+                self.register(name, handler)
+            return handler
+        return decorator
+
+    def handles_kind(self, *kinds: str) -> Callable[[Handler], Handler]:
+        """Decorator form of register_kind()."""
+        def decorator(handler: Handler) -> Handler:
+            for kind in kinds:
+                self.register_kind(kind, handler)
+            return handler
+        return decorator
+
+    def resolve(self, cls: type) -> Handler:
+        for base in cls.__mro__:
+            handler = self._by_name.get(base.__name__)
+            if handler is not None:
+                return handler
+        return self._dispatch_kind
+
+    def dispatch(self, obj: Any, state: Any) -> None:
+        cls = type(obj)
+        handler = self._cache.get(cls)
+        if handler is None:
+            handler = self._cache[cls] = self.resolve(cls)
+        handler(obj, state)
+
+    def _dispatch_kind(self, obj: Any, state: Any) -> None:
+        kind = getattr(obj, "type", None)
+        if kind is None:
+            self.default(obj, state)
+        else:
+            self._by_kind.get(kind, self.kind_default)(obj, state)
+
+
+def _ignore(obj: Any, state: Any) -> None:
+    pass
+
+
+# Content blocks inside an AssistantMessage
+ASSISTANT_BLOCKS = MessageDispatcher(
+    default=lambda block, state: state.log(type(block).__name__, kind="Block"),
+)
+
+# Content blocks inside a UserMessage: only tool results are interesting
+USER_BLOCKS = MessageDispatcher(default=_ignore)
+
+# Top-level messages from client.receive_response()
+MESSAGES = MessageDispatcher(
+    default=lambda message, state: state.log(type(message).__name__, kind="Unknown"),
+    kind_default=lambda message, state: state.log(message.type, kind="Message"),
+)
+
+
+@ASSISTANT_BLOCKS.handles("TextBlock")
+def handle_text(block: Any, state: Any) -> None:
+    state.log(block.text, kind="Bob")
+
+
+@ASSISTANT_BLOCKS.handles("ToolUseBlock")
+@MESSAGES.handles_kind("tool_use")
+def handle_tool_use(block: Any, state: Any) -> None:
+    name = getattr(block, "name", "unknown")
+    tool_input = getattr(block, "input", {})
+    state.metrics.tool_started(getattr(block, "id", None), name, payload_bytes(tool_input))
+    state.log(f"{name}|||{preview(tool_input)}", kind="Tool")
+
+
+@ASSISTANT_BLOCKS.handles("ToolResultBlock")
+@ASSISTANT_BLOCKS.handles_kind("tool_result")
+@USER_BLOCKS.handles("ToolResultBlock")
+@USER_BLOCKS.handles_kind("tool_result")
+@MESSAGES.handles_kind("tool_result")
+def handle_tool_result(block: Any, state: Any) -> None:
+    content = getattr(block, "content", "")
+    state.metrics.tool_finished(
+        getattr(block, "tool_use_id", None),
+        payload_bytes(content),
+        bool(getattr(block, "is_error", False)),
+    )
+    state.log(f"|||{preview(content)}", kind="Result")
+
+
+@MESSAGES.handles("AssistantMessage")
+def handle_assistant(message: Any, state: Any) -> None:
+    state.metrics.assistant_turns += 1
+    for block in message.content:
+        ASSISTANT_BLOCKS.dispatch(block, state)
+
+
+@MESSAGES.handles("UserMessage")
+def handle_user(message: Any, state: Any) -> None:
+    # String content is usually just a continuation - nothing to log
+    content = getattr(message, "content", None)
+    if isinstance(content, list):
+        for block in content:
+            USER_BLOCKS.dispatch(block, state)
+
+
+@MESSAGES.handles("ResultMessage")
+def handle_result(message: Any, state: Any) -> None:
+    cost = getattr(message, "total_cost_usd", None) or getattr(message, "cost_usd", None)
+    state.metrics.cost_usd = cost
+    state.metrics.usage = getattr(message, "usage", None)
+    if cost:
+        state.log(f"${cost:.4f}", kind="Cost")
+
+
+@MESSAGES.handles_kind("system")
+def handle_raw_system(message: Any, state: Any) -> None:
+    subtype = getattr(message, "subtype", "")
+    if subtype not in ("init", "ping"):
+        state.log(subtype, kind="System")
+
+
+# System messages are typically init/ping
+MESSAGES.register("SystemMessage", _ignore)
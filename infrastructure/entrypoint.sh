@@ -16,7 +16,9 @@ chown -R bob:bob /home/bob/.claude 2>/dev/null || true
 
 # Fix permissions on harness state files (may have been created by different user)
 chown bob:bob /bob/.harness_state.json 2>/dev/null || true
+chown bob:bob /bob/.harness_state.journal.jsonl 2>/dev/null || true
 chown bob:bob /bob/.harness_messages.json 2>/dev/null || true
+chown bob:bob /bob/.shared_state.db /bob/.shared_state.db-wal /bob/.shared_state.db-shm 2>/dev/null || true
 
 # Configure SSH if key exists
 if [ -f /home/bob/.claude/id_ed25519 ]; then
@@ -45,8 +47,8 @@ case "$MODE" in
 
     multi)
         # Multi-instance mode
-        NUM_INSTANCES="${2:-3}"
-        echo "Starting Bob's multi-instance harness ($NUM_INSTANCES instances)..."
+        ORCHESTRATOR_ARGS="${*:2}"
+        echo "Starting Bob's multi-instance harness (${ORCHESTRATOR_ARGS:-3 instances})..."
 
         # Start dashboard in background
         cd /bob/infrastructure
@@ -57,7 +59,8 @@ case "$MODE" in
         sleep 2
 
         # Start multi-harness orchestrator as bob user
-        su-exec bob env HOME=/home/bob python3 /bob/infrastructure/multi_harness.py $NUM_INSTANCES
+        # (extra arguments, e.g. `multi --autoscale 2 8`, are passed through)
+        su-exec bob env HOME=/home/bob python3 /bob/infrastructure/multi_harness.py "${@:2}"
 
         # If harness exits, also stop dashboard
         kill $DASHBOARD_PID 2>/dev/null || true
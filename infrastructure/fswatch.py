@@ -0,0 +1,126 @@
+"""
+File change notifications for the harness.
+
+Uses Linux inotify (through ctypes, no extra dependencies) to learn about
+writes to a file as soon as they happen. Where inotify is unavailable the
+watchers fall back to polling the file's mtime/size, which costs a stat()
+per interval but never reads the file.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+from pathlib import Path
+from typing import AsyncIterator
+
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# A file counts as changed once a writer closes it or renames it into place
+CHANGE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1  # noqa: B018 - probe the symbol
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+class Inotify:
+    """Minimal inotify wrapper reporting names changed in watched directories."""
+
+    def __init__(self):
+        if _libc is None:
+            raise OSError("inotify is not available")
+        fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd = fd
+
+    def add_watch(self, directory: Path, mask: int = CHANGE_MASK) -> None:
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def read_names(self) -> set[str]:
+        """Drain pending events and return the file names they refer to."""
+        names = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(buf):
+                _, _, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name:
+                    names.add(os.fsdecode(name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def signature(path: Path) -> tuple[int, int] | None:
+    """Cheap change marker for a file: (mtime_ns, size), None if missing."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+async def watch(path: Path, poll_interval: float = 0.5) -> AsyncIterator[None]:
+    """Yield every time `path` may have changed.
+
+    Uses inotify on the parent directory (so the file may be created or
+    replaced), falling back to mtime polling. Callers should check the file
+    once themselves before iterating.
+    """
+    try:
+        notify = Inotify()
+        notify.add_watch(path.parent)
+    except OSError:
+        async for _ in _poll(path, poll_interval):
+            yield
+        return
+
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    loop.add_reader(notify.fd, ready.set)
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            if path.name in notify.read_names():
+                yield
+    finally:
+        loop.remove_reader(notify.fd)
+        notify.close()
+
+
+async def _poll(path: Path, interval: float) -> AsyncIterator[None]:
+    last = signature(path)
+    while True:
+        await asyncio.sleep(interval)
+        current = signature(path)
+        if current != last:
+            last = current
+            yield
@@ -6,24 +6,28 @@ Bob can modify this file to change how he runs.
 """
 
 import asyncio
-import json
 import os
+import sqlite3
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from claude_code_sdk import (
-    ClaudeSDKClient,
-    ClaudeCodeOptions,
-    AssistantMessage,
-    UserMessage,
-    SystemMessage,
-    ResultMessage,
-    TextBlock,
-    ToolUseBlock,
-    ToolResultBlock,
-)
+import broker
+import fswatch
+from atomic_file import atomic_update
+from dispatch import MESSAGES
+from prompt import SESSION, STATIC, Prompt
+from shared_store import SharedStore
+from state_journal import StateJournal, load_state
+from telemetry import IterationMetrics, append_jsonl, rss_kb
+from tracing import export_trace
+from warmup import WarmupEngine
+
+from claude_code_sdk import ClaudeSDKClient, ClaudeCodeOptions
 
 
 BOB_WORKSPACE = os.environ.get("BOB_WORKSPACE", "/bob")
@@ -31,42 +35,143 @@ INSTANCE_ID = os.environ.get("BOB_INSTANCE_ID", "single")
 INSTANCE_ROLE = os.environ.get("BOB_INSTANCE_ROLE", "autonomous")
 INSTANCE_COUNT = int(os.environ.get("BOB_INSTANCE_COUNT", "1"))
 
+# Warm client reuse across iterations (opt-in)
+REUSE_CLIENT = os.environ.get("BOB_REUSE_CLIENT", "0") == "1"
+CLIENT_MAX_ITERATIONS = int(os.environ.get("BOB_CLIENT_MAX_ITERATIONS", "10"))
+CLIENT_MAX_AGE = float(os.environ.get("BOB_CLIENT_MAX_AGE_MIN", "30")) * 60
+
+# Pause between iterations: base, ceiling for backoff, and what counts as short
+PAUSE_SECONDS = float(os.environ.get("BOB_PAUSE_SECONDS", "5"))
+MAX_PAUSE_SECONDS = float(os.environ.get("BOB_MAX_PAUSE_SECONDS", "120"))
+SHORT_ITERATION_SECONDS = float(os.environ.get("BOB_SHORT_ITERATION_SECONDS", "30"))
+
+# Iteration budgets enforced by the watchdog (0 disables a budget)
+ITERATION_TIMEOUT = float(os.environ.get("BOB_ITERATION_TIMEOUT_MIN", "90")) * 60
+ITERATION_MAX_TURNS = int(os.environ.get("BOB_ITERATION_MAX_TURNS", "300"))
+
+# Chrome trace export of tool spans, one file per iteration
+TRACE_ENABLED = os.environ.get("BOB_TRACE", "1") == "1"
+TRACE_KEEP = int(os.environ.get("BOB_TRACE_KEEP", "50"))
+
+# Build the warmup report in-process and inline it into the prompt
+INLINE_WARMUP = os.environ.get("BOB_INLINE_WARMUP", "1") == "1"
+
+# Log entries kept in memory and in the checkpoint
+LOG_RETENTION = int(os.environ.get("BOB_LOG_RETENTION", "100"))
+
+# Minimum time between state writes; changes in between are coalesced
+STATE_FLUSH_INTERVAL = int(os.environ.get("BOB_STATE_FLUSH_MS", "250")) / 1000
+
+# Shared messages shown to an instance the first time it reads the log
+SHARED_MESSAGE_BACKLOG = int(os.environ.get("BOB_SHARED_MESSAGE_BACKLOG", "50"))
+
+# Inject messages addressed to this instance mid-conversation as they arrive,
+# instead of only in the next iteration's prompt (broadcasts always wait)
+PUSH_SHARED_MESSAGES = os.environ.get("BOB_PUSH_SHARED_MESSAGES", "1") == "1"
+
+# Seconds between liveness heartbeats to the shared store (multi-instance)
+HEARTBEAT_INTERVAL = float(os.environ.get("BOB_HEARTBEAT_SECONDS", "10"))
+
+STOP_FILE = Path(BOB_WORKSPACE) / "stop-autonomous"
+# Written by the orchestrator to retire just this instance (after the current iteration)
+RETIRE_FILE = Path(BOB_WORKSPACE) / f"stop-{INSTANCE_ID}"
+
 # Files depend on whether we're in multi-instance mode
 IS_MULTI_INSTANCE = INSTANCE_COUNT > 1
 
 if IS_MULTI_INSTANCE:
     MESSAGE_FILE = Path(BOB_WORKSPACE) / ".harness_messages.json"
     STATE_FILE = Path(BOB_WORKSPACE) / f".instance_{INSTANCE_ID}_state.json"
-    SHARED_MESSAGES = Path(BOB_WORKSPACE) / ".shared_messages.json"
-    INSTANCE_REGISTRY = Path(BOB_WORKSPACE) / ".instance_registry.json"
+    METRICS_FILE = Path(BOB_WORKSPACE) / f".instance_{INSTANCE_ID}_metrics.jsonl"
+    TRACE_DIR = Path(BOB_WORKSPACE) / f".instance_{INSTANCE_ID}_traces"
+    SHARED_STORE = SharedStore.for_workspace(BOB_WORKSPACE)
 else:
     MESSAGE_FILE = Path(BOB_WORKSPACE) / ".harness_messages.json"
     STATE_FILE = Path(BOB_WORKSPACE) / ".harness_state.json"
+    METRICS_FILE = Path(BOB_WORKSPACE) / ".harness_metrics.jsonl"
+    TRACE_DIR = Path(BOB_WORKSPACE) / ".harness_traces"
+
+
+class LogRecord:
+    """A single log entry, formatted only when serialized."""
+
+    __slots__ = ("timestamp", "kind", "payload", "_text")
+
+    def __init__(self, payload: str, kind: str = "", timestamp: float | None = None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.kind = kind  # Bob, Tool, Result, Cost, ... ("" for plain messages)
+        self.payload = payload
+        self._text: str | None = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "LogRecord":
+        """Wrap an already formatted entry (e.g. loaded from the checkpoint)."""
+        record = cls(text, timestamp=0.0)
+        record._text = text
+        return record
+
+    def format(self) -> str:
+        if self._text is None:
+            timestamp = datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+            prefix = f"{self.kind}: " if self.kind else ""
+            self._text = f"[{timestamp}] {prefix}{self.payload}"
+        return self._text
 
 
 @dataclass
 class HarnessState:
-    """Persistent state for the harness."""
+    """Persistent state for the harness.
+
+    Saved as a journal of changes (see state_journal.py) rather than by
+    rewriting the whole state file, so frequent saves stay cheap.
+    """
 
     running: bool = False
     current_task: str = ""
     iteration: int = 0
     last_activity: str = ""
-    logs: list[str] = field(default_factory=list)
+    logs: deque[LogRecord] = field(default_factory=lambda: deque(maxlen=LOG_RETENTION))
+    logs_total: int = 0  # entries ever logged
+    logs_dropped: int = 0  # entries evicted from the ring buffer
     instance_id: str = INSTANCE_ID
     instance_role: str = INSTANCE_ROLE
-    last_message_check: str = ""
-
-    def to_dict(self) -> dict[str, Any]:
+    message_seq: int | None = None  # last shared message seq read (None until the first read)
+    client_startup_ms: int = 0  # last measured client connect time
+    client_reuses: int = 0  # iterations that skipped client startup
+    client_startup_saved_ms: int = 0  # estimated startup time saved by reuse/prefetch
+    cancellations: int = 0  # iterations cancelled by the watchdog
+    last_cancel_reason: str = ""
+    metrics: IterationMetrics = field(default_factory=IterationMetrics, repr=False)  # not persisted
+    # Direct messages already injected mid-conversation, left out of the next prompt (not persisted)
+    pushed_seqs: set[int] = field(default_factory=set, repr=False)
+
+    # Journal bookkeeping: what has already been persisted
+    _journal: StateJournal = field(default_factory=lambda: StateJournal(STATE_FILE), repr=False)
+    _persisted: dict[str, Any] = field(default_factory=dict, repr=False)
+    _journaled_logs: int = field(default=0, repr=False)  # logs_total at last capture
+    _writer: "StateWriter | None" = field(default=None, repr=False)
+
+    def scalars(self) -> dict[str, Any]:
         return {
             "running": self.running,
             "current_task": self.current_task,
             "iteration": self.iteration,
             "last_activity": self.last_activity,
-            "logs": self.logs[-100:],  # Keep last 100 logs
             "instance_id": self.instance_id,
             "instance_role": self.instance_role,
-            "last_message_check": self.last_message_check,
+            "message_seq": self.message_seq,
+            "logs_dropped": self.logs_dropped,
+            "client_startup_ms": self.client_startup_ms,
+            "client_reuses": self.client_reuses,
+            "client_startup_saved_ms": self.client_startup_saved_ms,
+            "cancellations": self.cancellations,
+            "last_cancel_reason": self.last_cancel_reason,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **self.scalars(),
+            "logs": [record.format() for record in self.logs],
         }
 
     @classmethod
@@ -76,356 +181,737 @@ class HarnessState:
             current_task=data.get("current_task", ""),
             iteration=data.get("iteration", 0),
             last_activity=data.get("last_activity", ""),
-            logs=data.get("logs", []),
+            logs=deque(
+                (LogRecord.from_text(text) for text in data.get("logs", [])),
+                maxlen=LOG_RETENTION,
+            ),
+            logs_dropped=data.get("logs_dropped", 0),
             instance_id=data.get("instance_id", INSTANCE_ID),
             instance_role=data.get("instance_role", INSTANCE_ROLE),
-            last_message_check=data.get("last_message_check", ""),
+            message_seq=data.get("message_seq", (data.get("message_cursor") or {}).get("seq")),
+            client_startup_ms=data.get("client_startup_ms", 0),
+            client_reuses=data.get("client_reuses", 0),
+            client_startup_saved_ms=data.get("client_startup_saved_ms", 0),
+            cancellations=data.get("cancellations", 0),
+            last_cancel_reason=data.get("last_cancel_reason", ""),
         )
 
-    def log(self, message: str) -> None:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        entry = f"[{timestamp}] {message}"
-        self.logs.append(entry)
+    def log(self, message: str, kind: str = "") -> None:
+        if len(self.logs) == self.logs.maxlen:
+            self.logs_dropped += 1
+        self.logs.append(LogRecord(message, kind))
+        self.logs_total += 1
+
+    def unsaved_logs(self) -> list[str]:
+        """Formatted entries logged since the last capture that are still buffered."""
+        count = min(self.logs_total - self._journaled_logs, len(self.logs))
+        return [record.format() for record in islice(self.logs, len(self.logs) - count, None)]
+
+    def collect(self) -> Callable[[], None]:
+        """Capture unsaved changes and return a function that persists them.
+
+        Capturing is cheap and happens where the state is mutated (the event
+        loop); the returned write only touches the disk and can run in a
+        worker thread. Changes count as saved only once that write succeeds.
+        """
+        scalars = self.scalars()
+        logs_total = self.logs_total
+        changed = {k: v for k, v in scalars.items() if self._persisted.get(k) != v}
+        lines = self._journal.encode(changed, self.unsaved_logs())
+
+        checkpoint = None
+        had_checkpoint = self._journal.has_checkpoint
+        if self._journal.needs_compaction():
+            checkpoint = self._journal.begin_compaction(self.to_dict())
+
+        def write() -> None:
+            try:
+                self._journal.write(lines, checkpoint)
+            except BaseException:
+                # Nothing is marked saved, so the next capture includes these
+                # changes again (under new sequence numbers)
+                self._journal.has_checkpoint = had_checkpoint
+                raise
+            self._persisted = scalars
+            self._journaled_logs = logs_total
+
+        return write
 
     def save(self) -> None:
-        STATE_FILE.write_text(json.dumps(self.to_dict(), indent=2))
+        """Persist changes: coalesced by the background writer when running."""
+        if self._writer is not None:
+            self._writer.mark_dirty()
+        else:
+            self.collect()()
+
+    async def flush(self) -> None:
+        """Persist changes now (used on important transitions)."""
+        if self._writer is not None:
+            await self._writer.flush()
+        else:
+            self.collect()()
 
     @classmethod
     def load(cls) -> "HarnessState":
-        if STATE_FILE.exists():
+        data, seq, replayed = load_state(STATE_FILE, log_tail=LOG_RETENTION)
+        state = cls.from_dict(data)
+        state._journal.seq = seq
+        state._journal.pending = replayed
+        state._persisted = state.scalars()
+        return state
+
+
+class StateWriter:
+    """Background task that owns state persistence.
+
+    save() only marks the state dirty; the writer coalesces those marks into
+    at most one write per interval and performs it in a worker thread, so SDK
+    message consumption never waits on the disk.
+    """
+
+    def __init__(self, state: HarnessState, interval: float = STATE_FLUSH_INTERVAL):
+        self.state = state
+        self.interval = interval
+        self._dirty = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self.state._writer = self
+        self._task = asyncio.create_task(self._run())
+
+    def mark_dirty(self) -> None:
+        self._dirty.set()
+
+    async def flush(self) -> None:
+        # The lock keeps capture order and write order identical
+        async with self._lock:
+            self._dirty.clear()
+            write = self.state.collect()
+            await asyncio.to_thread(write)
+
+    async def _run(self) -> None:
+        while True:
+            await self._dirty.wait()
             try:
-                return cls.from_dict(json.loads(STATE_FILE.read_text()))
-            except (json.JSONDecodeError, KeyError):
+                # Shielded so cancellation never abandons a write halfway
+                await asyncio.shield(self.flush())
+            except Exception as e:  # disk or encoding error: keep the writer alive, retry on the next save
+                self.state.log(f"State write failed: {e}", kind="Error")
+            await asyncio.sleep(self.interval)
+
+    async def close(self) -> None:
+        """Stop the background task and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
                 pass
-        return cls()
+        await self.flush()
+        self.state._writer = None
 
 
-def get_pending_messages() -> list[str]:
-    """Get messages from Agus (via dashboard) without clearing them."""
-    if not MESSAGE_FILE.exists():
-        return []
+class ClientManager:
+    """Owns the SDK client lifecycle across iterations.
 
-    try:
-        data = json.loads(MESSAGE_FILE.read_text())
-        return data.get("messages", [])
-    except (json.JSONDecodeError, KeyError):
-        return []
+    By default every iteration gets a fresh client. With reuse enabled the
+    connected client is kept for up to `max_iterations` iterations or
+    `max_age` seconds, and recycled early after any failed iteration. Each
+    iteration talks on its own session id so conversations do not carry
+    over where the SDK supports separate sessions.
+    """
 
+    def __init__(
+        self,
+        reuse: bool = REUSE_CLIENT,
+        max_iterations: int = CLIENT_MAX_ITERATIONS,
+        max_age: float = CLIENT_MAX_AGE,
+    ):
+        self.reuse = reuse
+        self.max_iterations = max_iterations
+        self.max_age = max_age
+        self._client: ClaudeSDKClient | None = None
+        self._connecting: asyncio.Task | None = None
+        self._connected_at = 0.0
+        self._iterations = 0
+
+    @staticmethod
+    def _options() -> ClaudeCodeOptions:
+        return ClaudeCodeOptions(
+            permission_mode="bypassPermissions",
+            cwd=BOB_WORKSPACE,
+            model="sonnet",
+        )
 
-def clear_messages() -> None:
-    """Clear the message queue after reading."""
-    MESSAGE_FILE.write_text(json.dumps({"messages": []}, indent=2))
+    def _expired(self) -> bool:
+        return (
+            self._iterations >= self.max_iterations
+            or time.monotonic() - self._connected_at >= self.max_age
+        )
 
+    async def _connect(self) -> tuple[ClaudeSDKClient, int]:
+        started = time.monotonic()
+        client = ClaudeSDKClient(self._options())
+        await client.connect()
+        return client, int((time.monotonic() - started) * 1000)
+
+    async def prefetch(self) -> None:
+        """Start connecting the next iteration's client in the background."""
+        if self._client is not None and self._expired():
+            await self.close()
+        if self._client is None and self._connecting is None:
+            self._connecting = asyncio.create_task(self._connect())
+
+    async def acquire(self, state: HarnessState) -> tuple[ClaudeSDKClient, str]:
+        """Return a connected client and the session id for this iteration."""
+        if self._client is not None and self._expired():
+            await self.close()
+
+        if self._client is None:
+            if self._connecting is not None:
+                # Connected during the pause: the startup time is hidden
+                connecting, self._connecting = self._connecting, None
+                self._client, state.client_startup_ms = await connecting
+                state.client_startup_saved_ms += state.client_startup_ms
+            else:
+                self._client, state.client_startup_ms = await self._connect()
+            self._connected_at = time.monotonic()
+            self._iterations = 0
+        else:
+            state.client_reuses += 1
+            state.client_startup_saved_ms += state.client_startup_ms
+            state.log(f"Reusing warm client (saved ~{state.client_startup_ms} ms startup)")
+
+        self._iterations += 1
+        return self._client, f"iteration-{state.iteration}"
+
+    async def release(self, healthy: bool) -> None:
+        """Hand the client back after an iteration."""
+        if not (self.reuse and healthy):
+            await self.close()
+
+    async def close(self) -> None:
+        if self._connecting is not None:
+            connecting, self._connecting = self._connecting, None
+            connecting.cancel()
+            try:
+                self._client, _ = await connecting
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._client is not None:
+            client, self._client = self._client, None
+            try:
+                await client.disconnect()
+            except Exception:
+                pass  # Recycling a broken client must not fail the harness
 
-def consume_messages() -> list[str]:
-    """Get and clear messages from Agus."""
-    messages = get_pending_messages()
-    if messages:
-        clear_messages()
+
+def _take_messages(data: dict[str, Any]) -> list[str]:
+    messages = data.get("messages", [])
+    data["messages"] = []
     return messages
 
 
-def should_stop() -> bool:
-    """Check if stop was requested."""
-    stop_file = Path(BOB_WORKSPACE) / "stop-autonomous"
-    return stop_file.exists()
+def consume_messages() -> list[str]:
+    """Get and clear messages from Agus (one locked update, so none sent meanwhile are lost)."""
+    return atomic_update(MESSAGE_FILE, _take_messages)
 
 
-def get_shared_messages(since: str | None = None) -> list[dict[str, Any]]:
-    """Get messages from other instances."""
-    if not IS_MULTI_INSTANCE or not SHARED_MESSAGES.exists():
-        return []
+class MessageInbox:
+    """Operator messages delivered through an asyncio.Queue.
 
-    try:
-        data = json.loads(SHARED_MESSAGES.read_text())
+    A background task watches the message file (inotify, or mtime polling
+    as a fallback) and moves new messages onto the queue, so the response
+    loop can check for them without touching the disk.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self._arrived = asyncio.Event()
+        self._signature: tuple[int, int] | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        self._collect()
+        async for _ in fswatch.watch(MESSAGE_FILE):
+            self._collect()
+
+    def _collect(self) -> None:
+        signature = fswatch.signature(MESSAGE_FILE)
+        if signature in (None, self._signature):
+            return
+        # Remember the file as it was *before* consuming: a message sent right
+        # after we clear the queue then still looks new. Our own clearing write
+        # costs one extra consume, which finds nothing and writes nothing.
+        self._signature = signature
+        for message in consume_messages():
+            self.queue.put_nowait(message)
+            self._arrived.set()
+
+    def pending(self) -> bool:
+        return not self.queue.empty()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a message; True if one is queued."""
+        if self.pending():
+            return True
+        self._arrived.clear()
+        try:
+            await asyncio.wait_for(self._arrived.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.pending()
+
+    def drain(self) -> list[str]:
+        """Return all queued messages without waiting."""
         messages = []
+        while not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
+
+class SharedFeed:
+    """Messages addressed to this instance, pushed by the broker as they are posted.
+
+    Only direct messages interrupt a running conversation; broadcasts and
+    task/question traffic wait for the next prompt, since every injection
+    costs a model turn. Without a running broker, broker.follow() polls the
+    shared store instead. Messages are held until the response loop drains
+    them. Anything already shown in a prompt (up to the state's message_seq)
+    is never injected, and injected ones are recorded in pushed_seqs so the
+    next prompt skips them.
+    """
+
+    def __init__(self, state: HarnessState):
+        self.state = state
+        self._pending: list[dict[str, Any]] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:  # the feed died earlier; don't fail shutdown over it
+                self.state.log(f"Shared message feed failed: {e}", kind="Error")
+
+    async def _run(self) -> None:
+        after = self.state.message_seq
+        if after is None:
+            after = await asyncio.to_thread(SHARED_STORE.last_message_seq)
+        async for message in broker.follow(SHARED_STORE, [INSTANCE_ID], after):
+            self._pending.append(message)
+
+    def drain(self) -> list[dict[str, Any]]:
+        """New direct messages from other instances, marked as shown."""
+        seq = self.state.message_seq
+        if seq is None:
+            return []  # the first prompt has not shown the backlog yet
+        fresh = [
+            msg for msg in self._pending
+            if msg["seq"] > seq and msg["from"] != INSTANCE_ID and msg["seq"] not in self.state.pushed_seqs
+        ]
+        self._pending.clear()
+        self.state.pushed_seqs.update(msg["seq"] for msg in fresh)
+        return fresh
+
+
+class Heartbeat:
+    """Periodically records this instance's liveness in the shared store.
+
+    Each beat overwrites one fixed-size row (status, iteration, current task,
+    RSS); the orchestrator marks instances stale when their beats stop.
+    """
+
+    def __init__(self, state: HarnessState, interval: float = HEARTBEAT_INTERVAL):
+        self.state = state
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.beat()  # last word: stopped
+
+    async def beat(self) -> None:
+        state = self.state
+        status = "running" if state.running else "stopped"
+        try:
+            await asyncio.to_thread(
+                SHARED_STORE.heartbeat, INSTANCE_ID, os.getpid(), status,
+                state.iteration, state.current_task or "", rss_kb(),
+            )
+        except sqlite3.Error as e:
+            state.log(f"Heartbeat failed: {e}", kind="Error")
 
-        for msg in data.get("messages", []):
-            # Skip old messages
-            if since and msg["timestamp"] <= since:
+    async def _run(self) -> None:
+        while True:
+            await self.beat()
+            await asyncio.sleep(self.interval)
+
+
+class PausePolicy:
+    """Chooses how long to pause between iterations.
+
+    Productive iterations get the base pause. Short or idle ones (nothing to
+    do, or failing fast) double the pause up to a ceiling so an idle Bob
+    does not spin. Waiting operator messages skip the pause entirely.
+    """
+
+    def __init__(
+        self,
+        base: float = PAUSE_SECONDS,
+        ceiling: float = MAX_PAUSE_SECONDS,
+        short: float = SHORT_ITERATION_SECONDS,
+    ):
+        self.base = base
+        self.ceiling = ceiling
+        self.short = short
+        self.delay = base
+
+    def next_delay(self, duration: float, idle: bool) -> float:
+        if idle or duration < self.short:
+            self.delay = min(self.delay * 2, self.ceiling)
+        else:
+            self.delay = self.base
+        return self.delay
+
+
+class Watchdog:
+    """Cancels a running iteration that exceeds its budgets or must stop.
+
+    Wall-clock and turn budgets are checked every `tick` seconds against
+    in-memory counters; the stop file is watched (inotify or polling), so
+    a stop from the dashboard interrupts the iteration within seconds.
+    """
+
+    def __init__(
+        self,
+        timeout: float = ITERATION_TIMEOUT,
+        max_turns: int = ITERATION_MAX_TURNS,
+        tick: float = 1.0,
+    ):
+        self.timeout = timeout
+        self.max_turns = max_turns
+        self.tick = tick
+        self.stop_requested = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._watch_stop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _watch_stop(self) -> None:
+        # Only a fleet-wide stop interrupts an iteration; retiring waits for it to end
+        if STOP_FILE.exists():
+            self.stop_requested.set()
+        async for _ in fswatch.watch(STOP_FILE):
+            if STOP_FILE.exists():
+                self.stop_requested.set()
+            else:
+                self.stop_requested.clear()
+
+    def _violation(self, state: HarnessState, started: float) -> str | None:
+        if self.stop_requested.is_set():
+            return "stop requested"
+        elapsed = time.monotonic() - started
+        if self.timeout and elapsed > self.timeout:
+            return f"wall-clock budget exceeded ({elapsed / 60:.1f} > {self.timeout / 60:.1f} min)"
+        turns = state.metrics.assistant_turns
+        if self.max_turns and turns > self.max_turns:
+            return f"turn budget exceeded ({turns} > {self.max_turns} turns)"
+        return None
+
+    async def guard(self, iteration: asyncio.Task, state: HarnessState) -> str | None:
+        """Wait for the iteration; cancel it on a violation and return the reason."""
+        started = time.monotonic()
+        while True:
+            try:
+                done, _ = await asyncio.wait({iteration}, timeout=self.tick)
+            except asyncio.CancelledError:
+                # The harness itself is shutting down: take the iteration with it
+                iteration.cancel()
+                raise
+            if done:
+                iteration.result()  # Propagate iteration errors
+                return None
+
+            reason = self._violation(state, started)
+            if reason is None:
                 continue
 
-            # Include broadcasts and messages to this instance
-            if msg["to"] in ("broadcast", INSTANCE_ID):
-                messages.append(msg)
+            state.cancellations += 1
+            state.last_cancel_reason = reason
+            state.metrics.cancel_reason = reason
+            state.log(f"Watchdog cancelling iteration {state.iteration}: {reason}")
+            iteration.cancel()
+            try:
+                await iteration
+            except asyncio.CancelledError:
+                pass
+            await state.flush()
+            return reason
 
-        return messages
-    except (json.JSONDecodeError, KeyError):
+
+def should_stop() -> bool:
+    """Check if stop was requested (for everyone, or for this instance only)."""
+    return STOP_FILE.exists() or (IS_MULTI_INSTANCE and RETIRE_FILE.exists())
+
+
+def get_shared_messages(state: HarnessState) -> list[dict[str, Any]]:
+    """Get new messages from other instances, advancing the state's cursor."""
+    if not IS_MULTI_INSTANCE:
         return []
 
+    if state.message_seq is None:
+        # First run: recent history only, then follow new messages
+        state.message_seq = SHARED_STORE.last_message_seq()
+        messages = SHARED_STORE.recent_messages(SHARED_MESSAGE_BACKLOG, instance_id=INSTANCE_ID)
+        return [msg for msg in messages if msg["seq"] <= state.message_seq]
+
+    # Broadcasts and messages to this instance (indexed by recipient and seq)
+    messages = SHARED_STORE.messages_after(state.message_seq, INSTANCE_ID)
+    if messages:
+        state.message_seq = messages[-1]["seq"]
+    # Skip direct messages the feed already injected into the last conversation
+    pushed, state.pushed_seqs = state.pushed_seqs, {seq for seq in state.pushed_seqs if seq > state.message_seq}
+    return [msg for msg in messages if msg["seq"] not in pushed]
+
 
 def post_shared_message(to: str, msg_type: str, content: str, metadata: dict | None = None):
     """Post a message to other instances."""
     if not IS_MULTI_INSTANCE:
         return
 
-    if not SHARED_MESSAGES.exists():
-        SHARED_MESSAGES.write_text(json.dumps({"messages": []}, indent=2))
-
-    try:
-        data = json.loads(SHARED_MESSAGES.read_text())
-        message = {
-            "from": INSTANCE_ID,
-            "to": to,
-            "type": msg_type,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {},
-        }
-        data["messages"].append(message)
-        # Keep last 1000 messages
-        data["messages"] = data["messages"][-1000:]
-        SHARED_MESSAGES.write_text(json.dumps(data, indent=2))
-    except (json.JSONDecodeError, KeyError):
-        pass
+    broker.publish(SHARED_STORE, INSTANCE_ID, to, msg_type, content, metadata)
 
 
 def get_other_instances() -> list[dict[str, Any]]:
     """Get info about other running instances."""
-    if not IS_MULTI_INSTANCE or not INSTANCE_REGISTRY.exists():
+    if not IS_MULTI_INSTANCE:
         return []
 
-    try:
-        data = json.loads(INSTANCE_REGISTRY.read_text())
-        # Return all instances except this one
-        return [inst for inst in data.get("instances", []) if inst["instance_id"] != INSTANCE_ID]
-    except (json.JSONDecodeError, KeyError):
-        return []
+    return [inst for inst in SHARED_STORE.instances() if inst["instance_id"] != INSTANCE_ID]
 
 
 def clear_stop_signal() -> None:
     """Clear the stop signal for next run."""
-    stop_file = Path(BOB_WORKSPACE) / "stop-autonomous"
-    if stop_file.exists():
-        stop_file.unlink()
+    if STOP_FILE.exists():
+        STOP_FILE.unlink()
+
+
+def format_shared_messages(messages: list[dict[str, Any]]) -> str:
+    return "Messages from other instances:\n" + "\n".join(
+        f"  - [{msg['from']}]: {msg['content']}" for msg in messages
+    )
 
 
-async def process_response(client: ClaudeSDKClient, state: HarnessState) -> bool:
+async def process_response(
+    client: ClaudeSDKClient,
+    state: HarnessState,
+    inbox: MessageInbox,
+    feed: SharedFeed | None = None,
+    session_id: str = "default",
+) -> bool:
     """Process response from Bob, injecting user messages when they arrive.
 
     Returns True if we should continue the conversation, False if done.
     """
     async for message in client.receive_response():
         state.last_activity = datetime.now().isoformat()
-
-        # Handle SDK message types directly
-        if isinstance(message, AssistantMessage):
-            for block in message.content:
-                if isinstance(block, TextBlock):
-                    state.log(f"Bob: {block.text}")
-                elif isinstance(block, ToolUseBlock):
-                    input_str = json.dumps(block.input) if isinstance(block.input, dict) else str(block.input)
-                    if len(input_str) > 500:
-                        input_str = input_str[:500] + "..."
-                    state.log(f"Tool: {block.name}|||{input_str}")
-                elif isinstance(block, ToolResultBlock):
-                    content = block.content if hasattr(block, 'content') else str(block)
-                    if isinstance(content, str):
-                        result_preview = content[:500] + "..." if len(content) > 500 else content
-                    else:
-                        result_preview = str(content)[:500]
-                    state.log(f"Result: |||{result_preview}")
-                else:
-                    # Other block types
-                    block_type = type(block).__name__
-                    state.log(f"Block: {block_type}")
-
-        elif isinstance(message, UserMessage):
-            # UserMessage contains tool results being sent back
-            content = message.content
-            if isinstance(content, str):
-                # Simple string content - skip logging (usually just continuation)
-                pass
-            elif isinstance(content, list):
-                for block in content:
-                    if isinstance(block, ToolResultBlock):
-                        result_content = block.content if hasattr(block, 'content') else str(block)
-                        if isinstance(result_content, str):
-                            result_preview = result_content[:500] + "..." if len(result_content) > 500 else result_content
-                        else:
-                            result_preview = str(result_content)[:500]
-                        state.log(f"Result: |||{result_preview}")
-                    elif hasattr(block, 'type') and block.type == 'tool_result':
-                        result_content = getattr(block, 'content', str(block))
-                        if isinstance(result_content, str):
-                            result_preview = result_content[:500] + "..." if len(result_content) > 500 else result_content
-                        else:
-                            result_preview = str(result_content)[:500]
-                        state.log(f"Result: |||{result_preview}")
-
-        elif isinstance(message, SystemMessage):
-            # System messages - skip logging (typically init/ping)
-            pass
-
-        elif isinstance(message, ResultMessage):
-            # Final result message - log summary
-            if hasattr(message, 'cost_usd') and message.cost_usd:
-                state.log(f"Cost: ${message.cost_usd:.4f}")
-
-        elif hasattr(message, 'type'):
-            # Handle other message types from SDK with 'type' attribute
-            raw_type = getattr(message, 'type', 'unknown')
-
-            if raw_type == 'tool_use':
-                tool_name = getattr(message, 'name', 'unknown')
-                tool_input = getattr(message, 'input', {})
-                input_str = json.dumps(tool_input) if isinstance(tool_input, dict) else str(tool_input)
-                if len(input_str) > 500:
-                    input_str = input_str[:500] + "..."
-                state.log(f"Tool: {tool_name}|||{input_str}")
-            elif raw_type == 'tool_result':
-                content = getattr(message, 'content', '')
-                if isinstance(content, str):
-                    result_preview = content[:500] + "..." if len(content) > 500 else content
-                else:
-                    result_preview = str(content)[:500]
-                state.log(f"Result: |||{result_preview}")
-            elif raw_type == 'system':
-                subtype = getattr(message, 'subtype', '')
-                if subtype not in ('init', 'ping'):
-                    state.log(f"System: {subtype}")
-            else:
-                # Log other types for debugging
-                state.log(f"Message: {raw_type}")
-
-        else:
-            # Log unknown message structure with type info for debugging
-            msg_type = type(message).__name__
-
-            # Try to handle by class name as fallback (in case module paths differ)
-            if msg_type == 'UserMessage':
-                # Tool results - try to extract content
-                content = getattr(message, 'content', None)
-                if content and isinstance(content, list):
-                    for block in content:
-                        block_type = type(block).__name__
-                        if block_type == 'ToolResultBlock' or (hasattr(block, 'type') and getattr(block, 'type', '') == 'tool_result'):
-                            result_content = getattr(block, 'content', str(block))
-                            if isinstance(result_content, str):
-                                result_preview = result_content[:500] + "..." if len(result_content) > 500 else result_content
-                            else:
-                                result_preview = str(result_content)[:500]
-                            state.log(f"Result: |||{result_preview}")
-            elif msg_type == 'SystemMessage':
-                # Skip system messages
-                pass
-            elif msg_type == 'ResultMessage':
-                # Final result
-                cost = getattr(message, 'cost_usd', None)
-                if cost:
-                    state.log(f"Cost: ${cost:.4f}")
-            else:
-                state.log(f"Unknown: {msg_type}")
-
+        state.metrics.message_received()
+        MESSAGES.dispatch(message, state)
         state.save()
 
         # Check for pending messages from Agus after each response chunk
-        pending = get_pending_messages()
+        pending = inbox.drain()
         if pending:
             # Inject user message into the conversation
-            clear_messages()
             message_text = "\n".join(f"- {m}" for m in pending)
-            state.log(f"Agus: {message_text}")
+            state.log(message_text, kind="Agus")
+            state.metrics.injected_messages += len(pending)
             state.save()
 
             # Send the message to Bob in the same conversation
-            await client.query(f"Message from Agus:\n{message_text}")
+            await client.query(f"Message from Agus:\n{message_text}", session_id=session_id)
             # Continue processing - recursive call to handle the new response
             return True
 
+        shared = feed.drain() if feed else []
+        if shared:
+            for msg in shared:
+                state.log(msg["content"], kind=msg["from"])
+            state.metrics.injected_messages += len(shared)
+            state.save()
+            await client.query(format_shared_messages(shared), session_id=session_id)
+            return True
+
     return False
 
 
-async def run_conversation(client: ClaudeSDKClient, state: HarnessState, prompt: str) -> None:
+async def run_conversation(
+    client: ClaudeSDKClient,
+    state: HarnessState,
+    inbox: MessageInbox,
+    feed: SharedFeed | None,
+    prompt: str,
+    session_id: str = "default",
+) -> None:
     """Send a query and process the response, handling injected messages."""
     state.current_task = "Running"
     state.save()
 
-    await client.query(prompt)
+    await client.query(prompt, session_id=session_id)
 
     # Process responses, handling any injected messages
-    while await process_response(client, state):
+    while await process_response(client, state, inbox, feed, session_id):
         pass  # Keep processing while there are injected messages
 
 
-async def run_iteration(state: HarnessState, messages: list[str] | None = None) -> None:
-    """Run a single iteration with a fresh client."""
-    options = ClaudeCodeOptions(
-        permission_mode="bypassPermissions",
-        cwd=BOB_WORKSPACE,
-        model="sonnet",
-    )
+def build_context(state: HarnessState) -> dict[str, str]:
+    """Gather multi-instance context for the next prompt (reads shared files)."""
+    if not IS_MULTI_INSTANCE:
+        return {}
 
-    async with ClaudeSDKClient(options) as client:
-        # Build multi-instance context if applicable
-        multi_context = ""
-        if IS_MULTI_INSTANCE:
-            other_instances = get_other_instances()
-            instance_info = "\n".join(
-                f"  - {inst['instance_id']} ({inst['role']}) - {inst['status']}"
-                for inst in other_instances
-            )
+    instance_info = "\n".join(
+        f"  - {inst['instance_id']} ({inst['role']}) - {inst['status']}"
+        for inst in get_other_instances()
+    )
 
-            # Check for shared messages
-            shared_msgs = get_shared_messages(since=state.last_message_check)
-            shared_context = ""
-            if shared_msgs:
-                shared_context = "\n\nMessages from other instances:\n"
-                for msg in shared_msgs:
-                    shared_context += f"  - [{msg['from']}]: {msg['content']}\n"
+    # Check for shared messages
+    shared_msgs = get_shared_messages(state)
+    shared_context = format_shared_messages(shared_msgs) if shared_msgs else ""
 
-            state.last_message_check = datetime.now().isoformat()
+    return {
+        "instances": f"Other instances currently running:\n{instance_info}",
+        "shared_messages": shared_context,
+    }
 
-            multi_context = f"""
 
-## Multi-Instance Mode
+def gather_context(state: HarnessState, warmup: WarmupEngine | None) -> tuple[dict[str, str], str]:
+    """Everything the next prompt needs from disk: multi-instance context and warmup report."""
+    return build_context(state), warmup.report() if warmup else ""
 
-You are running as **{INSTANCE_ID}** with role **{INSTANCE_ROLE}**.
 
-Other instances currently running:
-{instance_info}
-{shared_context}
+def build_prompt(
+    state: HarnessState,
+    multi_context: dict[str, str],
+    warmup_report: str = "",
+    messages: list[str] | None = None,
+) -> Prompt:
+    """Assemble the prompt for the current iteration, most stable blocks first."""
+    if warmup_report:
+        orient = "read the warmup report at the end of this prompt to orient yourself."
+    else:
+        orient = "run your warmup script (./tools/warmup.sh) to orient yourself."
 
-You can communicate with other instances using these patterns:
-- To check other instances: Look at /bob/.instance_registry.json
-- To send a message: Write to /bob/.shared_messages.json
-- To see all messages: Read /bob/.shared_messages.json
+    prompt = Prompt()
+    prompt.add("instructions", f"""You are Bob, working autonomously in iterations.
 
-Work collaboratively when it makes sense, but maintain your autonomous decision-making.
-"""
+You have full autonomy. Make your own decisions about what to do.
+At the start of each iteration: {orient}
+When you're done with meaningful work for this iteration, say "ITERATION COMPLETE" to signal you're ready for the next cycle.""", STATIC)
 
-        if state.iteration == 1:
-            # Initial prompt
-            prompt = f"""You are Bob, starting a new autonomous session.{multi_context}
+    if IS_MULTI_INSTANCE:
+        prompt.add("role", f"""## Multi-Instance Mode
 
-Run your warmup script (./tools/warmup.sh) to orient yourself, then decide what to work on.
+You are running as **{INSTANCE_ID}** with role **{INSTANCE_ROLE}**.
 
-You have full autonomy. Make your own decisions about what to do.
-When you're done with meaningful work for this iteration, say "ITERATION COMPLETE" to signal you're ready for the next cycle."""
-        elif messages:
-            # Prompt with messages from Agus
-            message_text = "\n".join(f"- {m}" for m in messages)
-            prompt = f"""You are Bob, starting a new iteration.{multi_context}
+You can communicate with other instances using these patterns:
+- To check other instances: `python /bob/tools/coordinate.py --instance {INSTANCE_ID} instances`
+- To send a message: `python /bob/tools/coordinate.py --instance {INSTANCE_ID} message "..." [--to INSTANCE]`
+- To see recent messages: `python /bob/tools/coordinate.py --instance {INSTANCE_ID} messages`
+- To take the next queued task: `python /bob/tools/coordinate.py --instance {INSTANCE_ID} next` (claims expire unless renewed with `update`)
+
+Work collaboratively when it makes sense, but maintain your autonomous decision-making.""", STATIC)
+        prompt.add("instances", multi_context.get("instances", ""), SESSION)
+        prompt.add("shared_messages", multi_context.get("shared_messages", ""))
+
+    if state.iteration == 1:
+        # Initial prompt
+        prompt.add("task", "## This Iteration\n\nThis is a new autonomous session. Decide what to work on.")
+    elif messages:
+        # Prompt with messages from Agus
+        message_text = "\n".join(f"- {m}" for m in messages)
+        prompt.add("task", f"""## This Iteration
 
 Messages from Agus:
 {message_text}
 
-Run your warmup script to orient yourself, then respond to Agus's message(s) and continue your work.
-When done, say "ITERATION COMPLETE"."""
-        else:
-            # Continue autonomous work
-            prompt = f"""You are Bob, starting a new iteration.{multi_context}
-
-Run your warmup script to orient yourself, then continue your autonomous work.
-
-Check if there's more to do on your current work, or start something new.
-When you're done with meaningful work for this iteration, say "ITERATION COMPLETE"."""
-
-        await run_conversation(client, state, prompt)
+Respond to Agus's message(s) and continue your work.""")
+    else:
+        # Continue autonomous work
+        prompt.add("task", """## This Iteration
+
+Continue your autonomous work. Check if there's more to do on your current work, or start something new.""")
+
+    if warmup_report:
+        prompt.add("warmup", f"## Warmup Report\n\n{warmup_report}")
+    return prompt
+
+
+async def run_iteration(
+    state: HarnessState,
+    inbox: MessageInbox,
+    feed: SharedFeed | None,
+    clients: ClientManager,
+    prompt: Prompt,
+    previous: Prompt | None = None,
+) -> None:
+    """Run a single iteration (fresh client unless reuse is enabled)."""
+    state.metrics = IterationMetrics(iteration=state.iteration, instance_id=INSTANCE_ID)
+    state.metrics.prompt = prompt.stats(previous)
+    healthy = False
+    try:
+        client, session_id = await clients.acquire(state)
+        try:
+            await run_conversation(client, state, inbox, feed, prompt.text, session_id)
+            healthy = True
+        finally:
+            await clients.release(healthy)
+    finally:
+        record = state.metrics.to_dict()
+        await asyncio.to_thread(append_jsonl, METRICS_FILE, record)
+        if TRACE_ENABLED:
+            trace = state.metrics.spans.to_chrome_trace(
+                {"iteration": state.iteration, "instance_id": INSTANCE_ID, "wall_s": record["wall_s"]}
+            )
+            await asyncio.to_thread(export_trace, TRACE_DIR, state.iteration, trace, TRACE_KEEP)
 
 
 async def main() -> None:
-    """Main autonomous loop with fresh client per iteration."""
+    """Main autonomous loop (fresh client per iteration unless reuse is enabled)."""
 
     state = HarnessState.load()
     state.running = True
@@ -442,50 +928,114 @@ async def main() -> None:
     else:
         state.log("Harness starting")
 
-    state.save()
+    writer = StateWriter(state)
+    writer.start()
+    await state.flush()
+
+    inbox = MessageInbox()
+    inbox.start()
+
+    feed = SharedFeed(state) if IS_MULTI_INSTANCE and PUSH_SHARED_MESSAGES else None
+    if feed:
+        feed.start()
+
+    heartbeat = Heartbeat(state) if IS_MULTI_INSTANCE else None
+    if heartbeat:
+        heartbeat.start()
+
+    clients = ClientManager()
+    pause = PausePolicy()
 
-    clear_stop_signal()
+    watchdog = Watchdog()
+    watchdog.start()
+
+    warmup = WarmupEngine(Path(BOB_WORKSPACE)) if INLINE_WARMUP else None
+
+    # In a fleet the stop file is shared: a restarted or newly scaled instance
+    # must not undo an operator's stop. The orchestrator clears it on startup
+    if not IS_MULTI_INSTANCE:
+        clear_stop_signal()
+
+    # Prompt context (multi-instance, warmup report) gathered during the previous pause
+    context: tuple[dict[str, str], str] | None = None
+    # Last prompt sent, to measure how much of the next one repeats
+    previous_prompt: Prompt | None = None
 
     try:
-        # Main loop - each iteration gets a fresh client
+        # Main loop
         while True:
             state.iteration += 1
             state.log(f"Starting iteration {state.iteration}")
-            state.save()
+            await state.flush()
 
             # Check for messages
-            messages = consume_messages()
+            messages = inbox.drain()
             if messages:
                 state.log(f"Message received from Agus: {len(messages)} message(s)")
 
-            # Run iteration with fresh client (completes fully before checking stop)
-            await run_iteration(state, messages)
+            if context is None:
+                context = await asyncio.to_thread(gather_context, state, warmup)
+            multi_context, warmup_report = context
+            prompt = build_prompt(state, multi_context, warmup_report, messages)
+            context = None
+            if warmup:
+                await asyncio.to_thread(warmup.delivered)
+
+            # Run iteration under the watchdog (budgets and stop requests)
+            started = time.monotonic()
+            iteration = asyncio.create_task(run_iteration(state, inbox, feed, clients, prompt, previous_prompt))
+            await watchdog.guard(iteration, state)
+            duration = time.monotonic() - started
+            previous_prompt = prompt
 
-            # Check for stop signal ONLY after iteration completes
             if should_stop():
-                state.log("Stop signal received after iteration completed")
+                state.log("Stop signal received")
+                await state.flush()
                 break
 
             # Pause before next iteration
-            state.log("Pausing before next iteration...")
+            delay = pause.next_delay(duration, idle=state.metrics.tool_calls == 0)
+            if inbox.pending():
+                delay = 0.0
+            state.log(f"Pausing {delay:.1f}s before next iteration...")
             state.current_task = "Waiting"
-            state.save()
+            await state.flush()
 
-            # Simple pause without stop checks during iteration
-            await asyncio.sleep(5)
+            # Use the pause to get the next iteration ready
+            pause_started = time.monotonic()
+            await clients.prefetch()
+            context = await asyncio.to_thread(gather_context, state, warmup)
+
+            remaining = delay - (time.monotonic() - pause_started)
+            if remaining > 0 and await inbox.wait(remaining):
+                state.log("Message from Agus waiting - starting next iteration now")
+
+            if should_stop():
+                state.log("Stop signal received during pause")
+                await state.flush()
+                break
 
     except KeyboardInterrupt:
         state.log("Interrupted by keyboard")
 
     except Exception as e:
-        state.log(f"Error: {e}")
+        state.log(str(e), kind="Error")
+        await state.flush()
         raise
 
     finally:
         state.running = False
         state.current_task = "Stopped"
         state.log("Harness stopped")
-        state.save()
+        await watchdog.close()
+        await clients.close()
+        await inbox.close()
+        if feed:
+            await feed.close()
+        if heartbeat:
+            await heartbeat.close()
+        # Final flush is guaranteed even if the loop was cancelled or crashed
+        await writer.close()
 
 
 if __name__ == "__main__":
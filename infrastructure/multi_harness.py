@@ -5,22 +5,73 @@ Spawns multiple instances of Bob running simultaneously, Tachikoma-style.
 Manages shared communication and collective state.
 """
 
+import argparse
 import asyncio
-import json
-import signal
-import sys
+import logging
+import math
+import os
+import resource
+import time
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import UTC, datetime
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from typing import Any
 
+import fswatch
+import procstat
+from broker import Broker, socket_path
+from shared_store import SharedStore
+
 
 BOB_WORKSPACE = Path("/bob")
-INSTANCE_REGISTRY = BOB_WORKSPACE / ".instance_registry.json"
-SHARED_MESSAGES = BOB_WORKSPACE / ".shared_messages.json"
-SHARED_MEMORY = BOB_WORKSPACE / ".shared_memory.json"
+STORE = SharedStore.for_workspace(BOB_WORKSPACE)
 STOP_FILE = BOB_WORKSPACE / "stop-autonomous"
 
+# An instance whose last heartbeat is older than this is marked stale
+HEARTBEAT_TIMEOUT = float(os.environ.get("BOB_HEARTBEAT_TIMEOUT", "45"))
+
+# Instance stdout/stderr go to .instance_{id}.log, rotated at this size
+INSTANCE_LOG_BYTES = int(os.environ.get("BOB_INSTANCE_LOG_MB", "10")) * 1024 * 1024
+INSTANCE_LOG_BACKUPS = int(os.environ.get("BOB_INSTANCE_LOG_BACKUPS", "3"))
+
+# Longest line kept whole; longer output is split
+MAX_LOG_LINE = 64 * 1024
+
+# Supervision: restart instances that exit (unless stopped), backing off
+# exponentially from RESTART_DELAY up to RESTART_MAX_DELAY, and give up on an
+# instance that fails CRASH_LOOP_LIMIT times within CRASH_LOOP_WINDOW seconds
+SUPERVISE = os.environ.get("BOB_SUPERVISE", "1") == "1"
+RESTART_DELAY = float(os.environ.get("BOB_RESTART_DELAY", "2"))
+RESTART_MAX_DELAY = float(os.environ.get("BOB_RESTART_MAX_DELAY", "300"))
+CRASH_LOOP_LIMIT = int(os.environ.get("BOB_CRASH_LOOP_LIMIT", "5"))
+CRASH_LOOP_WINDOW = float(os.environ.get("BOB_CRASH_LOOP_WINDOW", "600"))
+# A run at least this long counts as healthy and resets the backoff
+HEALTHY_RUN_SECONDS = float(os.environ.get("BOB_HEALTHY_RUN_SECONDS", "120"))
+
+# Autoscaling (--autoscale MIN MAX): one instance per this many outstanding
+# work items, re-evaluated every interval, with separate cooldowns for growing
+# and shrinking the fleet
+AUTOSCALE_WORK_PER_INSTANCE = int(os.environ.get("BOB_AUTOSCALE_WORK_PER_INSTANCE", "3"))
+AUTOSCALE_INTERVAL = float(os.environ.get("BOB_AUTOSCALE_INTERVAL", "30"))
+AUTOSCALE_UP_COOLDOWN = float(os.environ.get("BOB_AUTOSCALE_UP_COOLDOWN", "60"))
+AUTOSCALE_DOWN_COOLDOWN = float(os.environ.get("BOB_AUTOSCALE_DOWN_COOLDOWN", "300"))
+
+# Resource sampling of each instance's process tree (procstat.py)
+RESOURCE_INTERVAL = float(os.environ.get("BOB_RESOURCE_INTERVAL", "5"))
+RESOURCE_KEEP_SECONDS = float(os.environ.get("BOB_RESOURCE_KEEP_HOURS", "6")) * 3600
+
+# Optional caps for every process of an instance (0 = unlimited): address
+# space in MiB and CPU seconds (a process over its CPU cap gets SIGXCPU and
+# is restarted by the supervisor)
+INSTANCE_MEMORY_MB = int(os.environ.get("BOB_INSTANCE_MEMORY_MB", "0"))
+INSTANCE_CPU_SECONDS = int(os.environ.get("BOB_INSTANCE_CPU_SECONDS", "0"))
+
+ROLES = ["explorer", "builder", "reflector", "coordinator"]
+
+# Demand for each role with no outstanding work (see role_demand)
+BASE_ROLE_DEMAND = {"explorer": 1.0, "builder": 0.75, "reflector": 0.5, "coordinator": 0.5}
+
 
 @dataclass
 class InstanceInfo:
@@ -44,6 +95,77 @@ class InstanceInfo:
         }
 
 
+@dataclass
+class RestartPolicy:
+    """Decides whether and when to restart an instance that exited on its own."""
+
+    delay: float = RESTART_DELAY
+    max_delay: float = RESTART_MAX_DELAY
+    crash_limit: int = CRASH_LOOP_LIMIT
+    crash_window: float = CRASH_LOOP_WINDOW
+    healthy_run: float = HEALTHY_RUN_SECONDS
+    failures: list[float] = field(default_factory=list)  # monotonic times
+    streak: int = 0  # consecutive short runs
+
+    def next_delay(self, exit_code: int | None, run_seconds: float) -> float | None:
+        """Seconds to wait before restarting, or None if the instance is crash-looping."""
+        now = time.monotonic()
+        if run_seconds >= self.healthy_run:
+            self.streak = 0
+        if exit_code != 0:
+            self.failures = [t for t in self.failures if now - t < self.crash_window]
+            self.failures.append(now)
+            if len(self.failures) >= self.crash_limit:
+                return None
+        self.streak += 1
+        return min(self.max_delay, self.delay * 2 ** (self.streak - 1))
+
+    def reset(self) -> None:
+        self.failures.clear()
+        self.streak = 0
+
+
+@dataclass
+class ScalePolicy:
+    """How many instances the outstanding work calls for."""
+
+    min_instances: int
+    max_instances: int
+    work_per_instance: int = AUTOSCALE_WORK_PER_INSTANCE
+    up_cooldown: float = AUTOSCALE_UP_COOLDOWN
+    down_cooldown: float = AUTOSCALE_DOWN_COOLDOWN
+
+    def desired(self, backlog: dict[str, int]) -> int:
+        wanted = math.ceil(sum(backlog.values()) / max(1, self.work_per_instance))
+        return max(self.min_instances, min(self.max_instances, wanted))
+
+
+def role_demand(backlog: dict[str, int]) -> dict[str, float]:
+    """How much each role is needed: tasks and proposals being worked on call
+    for builders, open proposals for explorers (to investigate) and a
+    coordinator (to triage); reflection stays at its baseline."""
+    demand = dict(BASE_ROLE_DEMAND)
+    demand["builder"] += backlog["tasks"] + backlog["proposals_active"]
+    demand["explorer"] += backlog["proposals_open"]
+    demand["coordinator"] += backlog["proposals_open"] / 2
+    return demand
+
+
+def pick_role(backlog: dict[str, int], roles: list[str]) -> str:
+    """The role most under-staffed relative to its demand."""
+    demand = role_demand(backlog)
+    return max(ROLES, key=lambda role: demand[role] / (roles.count(role) + 1))
+
+
+def pick_retiree(backlog: dict[str, int], active: dict[str, str]) -> str:
+    """The newest instance of the role most over-staffed relative to its demand."""
+    demand = role_demand(backlog)
+    roles = list(active.values())
+    role = min(set(roles), key=lambda role: demand[role] / roles.count(role))
+    candidates = [instance_id for instance_id, r in active.items() if r == role]
+    return max(candidates, key=lambda instance_id: int(instance_id.rsplit("_", 1)[-1]))
+
+
 @dataclass
 class SharedMessage:
     """Message passed between instances."""
@@ -54,9 +176,11 @@ class SharedMessage:
     content: str
     timestamp: str
     metadata: dict[str, Any] = field(default_factory=dict)
+    seq: int = 0  # assigned by the message log when posted
 
     def to_dict(self) -> dict[str, Any]:
         return {
+            "seq": self.seq,
             "from": self.from_instance,
             "to": self.to_instance,
             "type": self.msg_type,
@@ -65,105 +189,90 @@ class SharedMessage:
             "metadata": self.metadata,
         }
 
-    @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> "SharedMessage":
-        return cls(
-            from_instance=data["from"],
-            to_instance=data["to"],
-            msg_type=data["type"],
-            content=data["content"],
-            timestamp=data["timestamp"],
-            metadata=data.get("metadata", {}),
-        )
-
 
 class SharedState:
-    """Manages shared state between instances."""
+    """Manages shared state between instances (see shared_store.py)."""
 
     @staticmethod
     def init_files():
-        """Initialize shared state files."""
+        """Initialize shared state (old JSON files are migrated on first open)."""
         # Always reset instance registry on startup to remove stale entries
-        INSTANCE_REGISTRY.write_text(json.dumps({"instances": []}, indent=2))
-
-        if not SHARED_MESSAGES.exists():
-            SHARED_MESSAGES.write_text(json.dumps({"messages": []}, indent=2))
-
-        if not SHARED_MEMORY.exists():
-            SHARED_MEMORY.write_text(json.dumps({
-                "findings": [],
-                "decisions": [],
-                "learnings": [],
-            }, indent=2))
+        STORE.reset_instances()
 
     @staticmethod
     def register_instance(info: InstanceInfo):
         """Register a new instance."""
-        data = json.loads(INSTANCE_REGISTRY.read_text())
-        data["instances"].append(info.to_dict())
-        INSTANCE_REGISTRY.write_text(json.dumps(data, indent=2))
+        STORE.register_instance(info.to_dict())
 
     @staticmethod
     def update_instance_status(instance_id: str, status: str):
         """Update instance status."""
-        data = json.loads(INSTANCE_REGISTRY.read_text())
-        for instance in data["instances"]:
-            if instance["instance_id"] == instance_id:
-                instance["status"] = status
-                instance["last_heartbeat"] = datetime.now().isoformat()
-                break
-        INSTANCE_REGISTRY.write_text(json.dumps(data, indent=2))
+        STORE.update_instance_status(instance_id, status)
 
     @staticmethod
     def get_instances() -> list[dict[str, Any]]:
         """Get all registered instances."""
-        data = json.loads(INSTANCE_REGISTRY.read_text())
-        return data.get("instances", [])
+        return STORE.instances()
 
     @staticmethod
     def post_message(msg: SharedMessage):
-        """Post a message to shared queue."""
-        data = json.loads(SHARED_MESSAGES.read_text())
-        data["messages"].append(msg.to_dict())
-        # Keep last 1000 messages
-        data["messages"] = data["messages"][-1000:]
-        SHARED_MESSAGES.write_text(json.dumps(data, indent=2))
-
-    @staticmethod
-    def get_messages_for(instance_id: str, since: str | None = None) -> list[SharedMessage]:
-        """Get messages for a specific instance since timestamp."""
-        data = json.loads(SHARED_MESSAGES.read_text())
-        messages = []
-
-        for msg_data in data["messages"]:
-            # Skip old messages if since provided
-            if since and msg_data["timestamp"] <= since:
-                continue
-
-            # Include broadcasts and messages to this instance
-            if msg_data["to"] in ("broadcast", instance_id):
-                messages.append(SharedMessage.from_dict(msg_data))
-
-        return messages
-
-    @staticmethod
-    def add_finding(instance_id: str, finding: str):
-        """Add a finding to shared memory."""
-        data = json.loads(SHARED_MEMORY.read_text())
-        data["findings"].append({
-            "instance": instance_id,
-            "timestamp": datetime.now().isoformat(),
-            "content": finding,
-        })
-        # Keep last 500 findings
-        data["findings"] = data["findings"][-500:]
-        SHARED_MEMORY.write_text(json.dumps(data, indent=2))
-
-
-async def run_instance(instance_id: str, role: str, num_instances: int):
-    """Run a single Bob instance."""
-    import os
+        """Post a message to other instances (its seq and timestamp are assigned by the store).
 
+        Written to the store directly: the broker tails it and pushes the
+        message to subscribers.
+        """
+        record = STORE.post_message(
+            msg.from_instance, msg.to_instance, msg.msg_type, msg.content, msg.metadata
+        )
+        msg.seq = record["seq"]
+        msg.timestamp = record["timestamp"]
+
+
+def instance_logger(instance_id: str) -> logging.Logger:
+    """Size-capped, rotating log of an instance's process output."""
+    logger = logging.getLogger(f"bob.instance.{instance_id}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    handler = RotatingFileHandler(
+        BOB_WORKSPACE / f".instance_{instance_id}.log",
+        maxBytes=INSTANCE_LOG_BYTES,
+        backupCount=INSTANCE_LOG_BACKUPS,
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))  # lines are stamped by drain_output
+    logger.addHandler(handler)
+    return logger
+
+
+async def drain_output(stream: asyncio.StreamReader, logger: logging.Logger, label: str):
+    """Copy a child's pipe into its log line by line until EOF.
+
+    An unread pipe fills up (64 KiB on Linux) and then blocks the child on
+    its next write, so this must keep reading for the life of the process.
+    """
+    def write(lines: list[bytes]) -> None:
+        # Lines read together arrived together: one timestamp and one log record per read
+        prefix = f"{datetime.now().isoformat(sep=' ', timespec='milliseconds')} {label} "
+        logger.info("\n".join(prefix + line.decode("utf-8", "replace").rstrip("\r") for line in lines))
+
+    pending = b""
+    while chunk := await stream.read(MAX_LOG_LINE):
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) >= MAX_LOG_LINE:
+            lines.append(pending)
+            pending = b""
+        if lines:
+            write(lines)
+    if pending:
+        write([pending])
+
+
+async def start_instance(instance_id: str, role: str, num_instances: int,
+                         restart: bool = False) -> asyncio.subprocess.Process:
+    """Spawn a harness process and record it in the registry."""
     # Set environment variable for this instance
     env = os.environ.copy()
     env["BOB_INSTANCE_ID"] = instance_id
@@ -179,60 +288,321 @@ async def run_instance(instance_id: str, role: str, num_instances: int):
         stderr=asyncio.subprocess.PIPE,
     )
 
-    # Register instance
-    info = InstanceInfo(
-        instance_id=instance_id,
-        role=role,
-        pid=proc.pid,
-        started_at=datetime.now().isoformat(),
-        status="running",
-    )
-    SharedState.register_instance(info)
+    apply_limits(proc.pid)
+
+    started_at = datetime.now(UTC).isoformat()
+    if restart:
+        await asyncio.to_thread(STORE.record_restart, instance_id, proc.pid, started_at)
+    else:
+        info = InstanceInfo(
+            instance_id=instance_id,
+            role=role,
+            pid=proc.pid,
+            started_at=started_at,
+            status="running",
+        )
+        await asyncio.to_thread(SharedState.register_instance, info)
 
     print(f"[Orchestrator] Started {instance_id} ({role}) - PID {proc.pid}")
+    return proc
+
 
-    # Monitor the process
+def apply_limits(pid: int):
+    """Cap the new harness process; everything it spawns inherits the limits."""
+    # prlimit() right after spawning rather than a preexec_fn: forking with
+    # preexec_fn is unsafe once the orchestrator has worker threads
+    try:
+        if INSTANCE_MEMORY_MB:
+            limit = INSTANCE_MEMORY_MB * 1024 * 1024
+            resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+        if INSTANCE_CPU_SECONDS:
+            # Soft limit sends SIGXCPU; the hard limit (a bit later) SIGKILL
+            resource.prlimit(pid, resource.RLIMIT_CPU, (INSTANCE_CPU_SECONDS, INSTANCE_CPU_SECONDS + 10))
+    except (OSError, ValueError) as e:
+        print(f"[Orchestrator] Could not apply resource limits to PID {pid}: {e}")
+
+
+async def wait_instance(instance_id: str, proc: asyncio.subprocess.Process) -> int | None:
+    """Wait for the process to exit, draining its output so it never blocks on a full pipe."""
+    logger = instance_logger(instance_id)
     try:
-        await proc.wait()
+        await asyncio.gather(
+            drain_output(proc.stdout, logger, "[stdout]"),
+            drain_output(proc.stderr, logger, "[stderr]"),
+            proc.wait(),
+        )
         print(f"[Orchestrator] Instance {instance_id} exited with code {proc.returncode}")
     except Exception as e:
         print(f"[Orchestrator] Instance {instance_id} error: {e}")
         proc.kill()
+    finally:
+        for handler in logger.handlers:
+            handler.close()
+    return proc.returncode
+
+
+async def wait_stop_file(present: bool):
+    """Return once the stop file exists (or, with present=False, is gone)."""
+    if STOP_FILE.exists() == present:
+        return
+    async for _ in fswatch.watch(STOP_FILE):
+        if STOP_FILE.exists() == present:
+            return
+
+
+def retire_path(instance_id: str) -> Path:
+    """Per-instance stop file: the harness exits after its current iteration."""
+    return BOB_WORKSPACE / f"stop-{instance_id}"
+
+
+async def supervise(instance_id: str, role: str, num_instances: int, proc: asyncio.subprocess.Process):
+    """Keep an instance running: restart it with backoff when it exits, and
+    after a stop once the stop file is cleared.
+
+    A crash-looping instance is parked until the operator stops and clears
+    the fleet, which gives every instance a clean start.
+    """
+    policy = RestartPolicy()
+    while True:
+        started = time.monotonic()
+        exit_code = await wait_instance(instance_id, proc)
+        run_seconds = time.monotonic() - started
+
+        retire_file = retire_path(instance_id)
+        if retire_file.exists():
+            retire_file.unlink(missing_ok=True)
+            await asyncio.to_thread(STORE.record_exit, instance_id, exit_code, run_seconds, "retired")
+            print(f"[Orchestrator] Instance {instance_id} retired")
+            return
+
+        if STOP_FILE.exists():
+            await asyncio.to_thread(STORE.record_exit, instance_id, exit_code, run_seconds, "stopped")
+            if not SUPERVISE:
+                return
+            await wait_stop_file(present=False)
+            policy.reset()
+            print(f"[Orchestrator] Stop cleared - restarting {instance_id}")
+        elif not SUPERVISE:
+            await asyncio.to_thread(STORE.record_exit, instance_id, exit_code, run_seconds)
+            return
+        else:
+            delay = policy.next_delay(exit_code, run_seconds)
+            if delay is None:
+                await asyncio.to_thread(STORE.record_exit, instance_id, exit_code, run_seconds, "crash-loop")
+                print(f"[Orchestrator] Instance {instance_id} failed {policy.crash_limit} times "
+                      f"in {policy.crash_window:.0f}s - parked until the next stop/clear")
+                await wait_stop_file(present=True)
+                await wait_stop_file(present=False)
+                policy.reset()
+                print(f"[Orchestrator] Stop cleared - restarting {instance_id}")
+            else:
+                await asyncio.to_thread(STORE.record_exit, instance_id, exit_code, run_seconds, "restarting")
+                print(f"[Orchestrator] Restarting {instance_id} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                if STOP_FILE.exists():
+                    # Stopped while backing off: wait like the rest of the fleet
+                    await asyncio.to_thread(STORE.update_instance_status, instance_id, "stopped")
+                    await wait_stop_file(present=False)
+                    policy.reset()
+
+        proc = await start_instance(instance_id, role, num_instances, restart=True)
+
+
+class Fleet:
+    """The supervised instances; can grow and shrink while running."""
+
+    def __init__(self, instance_count: int):
+        self.instance_count = instance_count  # BOB_INSTANCE_COUNT passed to every harness
+        self.members: dict[str, str] = {}  # instance_id -> role
+        self.retiring: set[str] = set()
+        self.tasks: dict[str, asyncio.Task] = {}
+
+    def active(self) -> dict[str, str]:
+        """Instances that are not being retired."""
+        return {i: role for i, role in self.members.items() if i not in self.retiring}
+
+    def _next_id(self) -> str:
+        n = 1
+        while f"instance_{n}" in self.members:
+            n += 1
+        return f"instance_{n}"
+
+    async def spawn(self, roles: list[str]) -> list[str]:
+        """Start one instance per role, all at once."""
+        ids = []
+        for role in roles:
+            instance_id = self._next_id()
+            self.members[instance_id] = role
+            ids.append(instance_id)
+        procs = await asyncio.gather(
+            *(start_instance(i, self.members[i], self.instance_count) for i in ids)
+        )
+        for instance_id, proc in zip(ids, procs):
+            self.tasks[instance_id] = asyncio.create_task(self._supervise(instance_id, proc))
+        return ids
+
+    async def _supervise(self, instance_id: str, proc: asyncio.subprocess.Process):
+        try:
+            await supervise(instance_id, self.members[instance_id], self.instance_count, proc)
+        finally:
+            self.members.pop(instance_id, None)
+            self.retiring.discard(instance_id)
+            self.tasks.pop(instance_id, None)
+
+    def retire(self, instance_id: str):
+        """Ask an instance to exit after its current iteration, for good."""
+        self.retiring.add(instance_id)
+        retire_path(instance_id).touch()
+
+    async def wait(self):
+        """Until every instance has ended (instances spawned meanwhile included)."""
+        while self.tasks:
+            await asyncio.wait(list(self.tasks.values()))
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
 
 
-async def main():
-    """Main orchestrator - spawns and manages multiple instances."""
+async def autoscale(fleet: Fleet, policy: ScalePolicy, interval: float = AUTOSCALE_INTERVAL):
+    """Grow and shrink the fleet with the outstanding tasks and proposals."""
+    last_up = last_down = -math.inf
+    while True:
+        await asyncio.sleep(interval)
+        if STOP_FILE.exists():
+            continue
+
+        backlog = await asyncio.to_thread(STORE.backlog)
+        active = fleet.active()
+        desired = policy.desired(backlog)
+        now = time.monotonic()
+
+        if desired > len(active) and now - last_up >= policy.up_cooldown:
+            roles = list(active.values())
+            new_roles = []
+            for _ in range(desired - len(active)):
+                role = pick_role(backlog, roles + new_roles)
+                new_roles.append(role)
+            print(f"[Orchestrator] Backlog {backlog} - scaling up to {desired}: {', '.join(new_roles)}")
+            await fleet.spawn(new_roles)
+            last_up = now
+
+        elif (desired < len(active) and now - last_down >= policy.down_cooldown
+              and now - last_up >= policy.down_cooldown):
+            # One at a time: each retirement waits out a full cooldown
+            instance_id = pick_retiree(backlog, active)
+            print(f"[Orchestrator] Backlog {backlog} - retiring {instance_id} ({active[instance_id]})")
+            fleet.retire(instance_id)
+            last_down = now
+
+
+def take_resource_samples(previous: dict[tuple[str, int], tuple[float, float]]) -> list[dict[str, Any]]:
+    """One usage sample per live instance; `previous` carries CPU time between calls."""
+    instances = [
+        inst for inst in STORE.instances()
+        if inst["pid"] and inst["status"] in ("starting", "running", "stale")
+    ]
+    if not instances:
+        return []
+    children = procstat.children_map()
+    now, ts = time.monotonic(), int(time.time())
+    samples = []
+    seen = set()
+    for inst in instances:
+        key = (inst["instance_id"], inst["pid"])  # a restart starts a new CPU counter
+        usage = procstat.tree_usage(inst["pid"], children)
+        if usage is None:
+            continue
+        seen.add(key)
+        cpu_pct = 0.0
+        if key in previous:
+            then, cpu_then = previous[key]
+            cpu_pct = max(0.0, (usage.cpu_s - cpu_then) / (now - then) * 100)
+        previous[key] = (now, usage.cpu_s)
+        samples.append({"instance_id": inst["instance_id"], "ts": ts, "cpu_pct": round(cpu_pct, 1),
+                        **usage.to_dict()})
+    for key in set(previous) - seen:
+        del previous[key]
+    return samples
+
+
+async def sample_resources(interval: float = RESOURCE_INTERVAL):
+    """Record CPU, RSS, open fds and threads of every instance's process tree."""
+    previous: dict[tuple[str, int], tuple[float, float]] = {}
+    while True:
+        samples = await asyncio.to_thread(take_resource_samples, previous)
+        if samples:
+            await asyncio.to_thread(STORE.add_resource_samples, samples, RESOURCE_KEEP_SECONDS)
+        await asyncio.sleep(interval)
+
+
+async def monitor_heartbeats(interval: float = HEARTBEAT_TIMEOUT / 3):
+    """Mark instances stale when their heartbeats stop (and running again when they resume)."""
+    while True:
+        await asyncio.sleep(interval)
+        stale, revived = await asyncio.to_thread(STORE.mark_stale, HEARTBEAT_TIMEOUT)
+        for instance_id in stale:
+            print(f"[Orchestrator] Instance {instance_id} missed heartbeats "
+                  f"for {HEARTBEAT_TIMEOUT:.0f}s - marked stale")
+        for instance_id in revived:
+            print(f"[Orchestrator] Instance {instance_id} heartbeat resumed")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bob's multi-instance orchestrator")
+    parser.add_argument("instances", nargs="?", type=int, default=3,
+                        help="Number of instances (2-4) without autoscaling")
+    parser.add_argument("--autoscale", nargs=2, type=int, metavar=("MIN", "MAX"),
+                        help="Scale between MIN and MAX instances with the task/proposal backlog")
+    args = parser.parse_args()
+
+    if args.autoscale:
+        low, high = args.autoscale
+        if low < 1 or high < 2 or low > high:
+            parser.error("--autoscale needs 1 <= MIN <= MAX and MAX >= 2")
+    elif args.instances < 2 or args.instances > 4:
+        parser.error("Number of instances must be between 2 and 4")
+    return args
 
-    # Parse command line args
-    num_instances = int(sys.argv[1]) if len(sys.argv) > 1 else 3
 
-    if num_instances < 2 or num_instances > 4:
-        print("Error: Number of instances must be between 2 and 4")
-        sys.exit(1)
+async def main():
+    """Main orchestrator - spawns and manages multiple instances."""
+    args = parse_args()
+    policy = ScalePolicy(*args.autoscale) if args.autoscale else None
+    num_instances = policy.min_instances if policy else args.instances
 
     print("=" * 70)
     print("Bob's Multi-Instance Orchestrator")
     print("=" * 70)
-    print(f"Spawning {num_instances} instances...")
+    if policy:
+        print(f"Autoscaling between {policy.min_instances} and {policy.max_instances} instances...")
+    else:
+        print(f"Spawning {num_instances} instances...")
     print()
 
     # Initialize shared state
     SharedState.init_files()
-
-    # Define roles (cycle through them)
-    roles = ["explorer", "builder", "reflector", "coordinator"]
-
-    # Start instances
-    tasks = []
-    for i in range(num_instances):
-        instance_id = f"instance_{i+1}"
-        role = roles[i % len(roles)]
-
-        task = asyncio.create_task(run_instance(instance_id, role, num_instances))
-        tasks.append(task)
-
-        # Small delay between starts
-        await asyncio.sleep(1)
+    # Stop and retire signals left over from an earlier run. Only here: instances
+    # started later by the supervisor or autoscaler leave the stop file alone
+    STOP_FILE.unlink(missing_ok=True)
+    for retire_file in BOB_WORKSPACE.glob("stop-instance_*"):
+        retire_file.unlink(missing_ok=True)
+
+    # Message broker: pushes shared messages to instances and the dashboard
+    broker = Broker(STORE, socket_path(BOB_WORKSPACE))
+    await broker.start()
+    print(f"[Orchestrator] Message broker listening on {broker.path}")
+
+    # Start instances, all at once (harnesses only need the count to be > 1)
+    fleet = Fleet(policy.max_instances if policy else num_instances)
+    if policy:
+        backlog = await asyncio.to_thread(STORE.backlog)
+        roles: list[str] = []
+        for _ in range(policy.desired(backlog)):
+            roles.append(pick_role(backlog, roles))
+    else:
+        roles = [ROLES[i % len(ROLES)] for i in range(num_instances)]
+    await fleet.spawn(roles)
 
     print()
     print("=" * 70)
@@ -241,19 +611,28 @@ async def main():
     print("=" * 70)
     print()
 
+    monitor = asyncio.create_task(monitor_heartbeats())
+    sampler = asyncio.create_task(sample_resources())
+    scaler = asyncio.create_task(autoscale(fleet, policy)) if policy else None
+
     # Wait for all instances
     try:
-        await asyncio.gather(*tasks)
+        await fleet.wait()
     except KeyboardInterrupt:
         print("\n[Orchestrator] Shutting down...")
-        for task in tasks:
-            task.cancel()
+        fleet.cancel()
 
         # Signal all instances to stop
         STOP_FILE.touch()
 
         # Wait a bit for graceful shutdown
         await asyncio.sleep(2)
+    finally:
+        monitor.cancel()
+        sampler.cancel()
+        if scaler:
+            scaler.cancel()
+        await broker.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""
+Resource usage of process trees, read from /proc.
+
+The orchestrator samples each instance's harness together with everything
+it spawned (the Claude CLI, shells, tools). One pass over /proc builds the
+parent -> children map for all instances; each tree then costs a few small
+reads per process. Linux only; elsewhere every sample comes back empty.
+"""
+
+import os
+from dataclasses import dataclass
+
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024
+
+# Indexes into the fields of /proc/<pid>/stat after the ")" closing the command
+# name (which may itself contain spaces); see proc(5)
+_PPID, _UTIME, _STIME, _CUTIME, _CSTIME, _THREADS, _RSS = 1, 11, 12, 13, 14, 17, 21
+
+
+@dataclass
+class TreeUsage:
+    """Totals over a process and its live descendants."""
+
+    cpu_s: float = 0.0  # user + system, including reaped children
+    rss_kb: int = 0
+    fds: int = 0
+    threads: int = 0
+    procs: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "cpu_s": round(self.cpu_s, 2),
+            "rss_kb": self.rss_kb,
+            "fds": self.fds,
+            "threads": self.threads,
+            "procs": self.procs,
+        }
+
+
+def _stat(pid: int) -> list[str] | None:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+
+
+def children_map() -> dict[int, list[int]]:
+    """Parent pid -> child pids for every process visible in /proc."""
+    children: dict[int, list[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        fields = _stat(int(entry))
+        if fields is not None:
+            children.setdefault(int(fields[_PPID]), []).append(int(entry))
+    return children
+
+
+def tree_usage(pid: int, children: dict[int, list[int]]) -> TreeUsage | None:
+    """Usage of `pid` and its descendants, or None if the process is gone."""
+    usage = TreeUsage()
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        fields = _stat(current)
+        if fields is None:
+            if current == pid:
+                return None
+            continue  # exited between the /proc scan and now
+        ticks = sum(int(fields[i]) for i in (_UTIME, _STIME, _CUTIME, _CSTIME))
+        usage.cpu_s += ticks / CLOCK_TICKS
+        usage.rss_kb += int(fields[_RSS]) * PAGE_KB
+        usage.threads += int(fields[_THREADS])
+        usage.procs += 1
+        try:
+            usage.fds += len(os.listdir(f"/proc/{current}/fd"))
+        except OSError:
+            pass  # not ours to inspect, or gone
+        stack.extend(children.get(current, ()))
+    return usage
@@ -0,0 +1,101 @@
+"""
+Cache-friendly prompt assembly.
+
+A prompt is a list of named blocks, ordered from most to least stable:
+static instructions first, then per-session parts (role, other instances),
+then the parts that change every iteration (messages, warmup report). That
+keeps the prompt prefix byte-identical across iterations, which is what
+provider-side prefix caching keys on. Each block is hashed so the harness
+can measure how much of the prompt actually repeats.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any
+
+
+# Block stability tiers, in prompt order
+STATIC = 0    # never changes while the harness runs
+SESSION = 1   # changes rarely (role, instance roster)
+VOLATILE = 2  # changes every iteration
+
+TIER_NAMES = {STATIC: "static", SESSION: "session", VOLATILE: "volatile"}
+
+SEPARATOR = "\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 UTF-8 bytes per token); no tokenizer needed."""
+    size = len(text) if text.isascii() else len(text.encode("utf-8", "replace"))
+    return (size + 3) // 4
+
+
+@dataclass(frozen=True)
+class PromptBlock:
+    name: str
+    text: str
+    tier: int = VOLATILE
+
+    @property
+    def hash(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8", "replace")).hexdigest()[:16]
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+@dataclass
+class Prompt:
+    """Ordered prompt blocks and the text sent to the model."""
+
+    blocks: list[PromptBlock] = field(default_factory=list)
+
+    def add(self, name: str, text: str, tier: int = VOLATILE) -> "Prompt":
+        """Add a block; empty blocks are skipped so they do not shift the layout."""
+        if text.strip():
+            self.blocks.append(PromptBlock(name, text.strip("\n"), tier))
+        return self
+
+    def ordered(self) -> list[PromptBlock]:
+        # Stable sort: blocks within a tier keep the order they were added in
+        return sorted(self.blocks, key=lambda block: block.tier)
+
+    @property
+    def text(self) -> str:
+        return SEPARATOR.join(block.text for block in self.ordered())
+
+    def stats(self, previous: "Prompt | None" = None) -> dict[str, Any]:
+        """Per-block hashes and token estimates, compared with the previous prompt.
+
+        `prefix_tokens` counts the leading blocks identical to the previous
+        prompt's leading blocks: the part a prefix cache can serve.
+        """
+        blocks = self.ordered()
+        before = previous.ordered() if previous else []
+        seen = {block.hash for block in before}
+
+        prefix = 0
+        for i, block in enumerate(blocks):
+            if i >= len(before) or before[i].hash != block.hash:
+                break
+            prefix += 1
+
+        total = sum(block.tokens for block in blocks)
+        prefix_tokens = sum(block.tokens for block in blocks[:prefix])
+        return {
+            "tokens": total,
+            "prefix_blocks": prefix,
+            "prefix_tokens": prefix_tokens,
+            "prefix_ratio": round(prefix_tokens / total, 3) if total else 0.0,
+            "blocks": [
+                {
+                    "name": block.name,
+                    "tier": TIER_NAMES[block.tier],
+                    "hash": block.hash,
+                    "tokens": block.tokens,
+                    "repeated": block.hash in seen,
+                }
+                for block in blocks
+            ],
+        }
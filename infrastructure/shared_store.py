@@ -0,0 +1,1097 @@
+"""
+SQLite store for shared multi-instance state.
+
+One WAL-mode database (`.shared_state.db` in the workspace) holds everything
+instances share: the instance registry, messages, shared memory findings,
+coordination tasks, questions (tools/instance_wait.py) and proposals
+(tools/propose.py). Every write is a single transaction, so concurrent
+instances no longer lose each other's updates, and the common lookups
+("open questions for instance_2", "next queued task", "messages after
+seq N") are served from indexes.
+
+Records are returned as plain dicts shaped like the JSON files they
+replace. Those files are imported once, the first time the store is
+opened, and renamed to `<name>.migrated`.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+DB_NAME = ".shared_state.db"
+
+# How long a task claim lasts without an update (tools/coordinate.py)
+TASK_LEASE_SECONDS = float(os.environ.get("BOB_TASK_LEASE_SECONDS", "900"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS instances (
+    instance_id TEXT PRIMARY KEY,
+    role TEXT NOT NULL,
+    pid INTEGER,
+    started_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    last_heartbeat TEXT NOT NULL DEFAULT '',
+    restarts INTEGER NOT NULL DEFAULT 0,
+    exit_code INTEGER,
+    uptime_s REAL NOT NULL DEFAULT 0
+);
+
+-- One fixed-size row per instance, overwritten by each heartbeat
+CREATE TABLE IF NOT EXISTS heartbeats (
+    instance_id TEXT PRIMARY KEY,
+    pid INTEGER,
+    status TEXT NOT NULL,
+    iteration INTEGER NOT NULL DEFAULT 0,
+    current_task TEXT NOT NULL DEFAULT '',
+    rss_kb INTEGER NOT NULL DEFAULT 0,
+    beat_at REAL NOT NULL
+);
+
+-- Resource time series sampled by the orchestrator (process tree of each instance)
+CREATE TABLE IF NOT EXISTS resource_samples (
+    instance_id TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    cpu_pct REAL NOT NULL,
+    cpu_s REAL NOT NULL,
+    rss_kb INTEGER NOT NULL,
+    fds INTEGER NOT NULL,
+    threads INTEGER NOT NULL,
+    procs INTEGER NOT NULL,
+    PRIMARY KEY (instance_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resource_samples_ts ON resource_samples (ts);
+
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS messages_recipient ON messages (recipient, seq);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages (sender, seq);
+
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    instance TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_kind ON findings (kind, id);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    claimed_by TEXT NOT NULL,
+    claimed_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    completed_at TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, claimed_by);
+CREATE INDEX IF NOT EXISTS tasks_owner ON tasks (claimed_by, status);
+
+CREATE TABLE IF NOT EXISTS task_updates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL REFERENCES tasks (task_id),
+    timestamp TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS task_updates_task ON task_updates (task_id, id);
+
+-- Completed tasks, moved out of tasks on completion. Clustered by month and
+-- completion time, so a date range is one contiguous scan; updates are kept
+-- inline as JSON
+CREATE TABLE IF NOT EXISTS task_archive (
+    month TEXT NOT NULL,
+    completed_at TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    description TEXT NOT NULL,
+    claimed_by TEXT NOT NULL,
+    claimed_at TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    result TEXT,
+    updates TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (month, completed_at, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS task_archive_owner ON task_archive (claimed_by, month, completed_at);
+
+CREATE TABLE IF NOT EXISTS questions (
+    question_id TEXT PRIMARY KEY,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    question TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_open ON questions (status, recipient);
+CREATE INDEX IF NOT EXISTS questions_age ON questions (status, timestamp);
+
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL REFERENCES questions (question_id),
+    sender TEXT NOT NULL,
+    response TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_question ON responses (question_id, id);
+
+CREATE TABLE IF NOT EXISTS proposals (
+    id TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS proposals_status ON proposals (status);
+
+CREATE TABLE IF NOT EXISTS proposal_claims (
+    proposal_id TEXT NOT NULL REFERENCES proposals (id),
+    instance_id TEXT NOT NULL,
+    PRIMARY KEY (proposal_id, instance_id)
+);
+
+CREATE TABLE IF NOT EXISTS proposal_responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    proposal_id TEXT NOT NULL REFERENCES proposals (id),
+    timestamp TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS proposal_responses_proposal ON proposal_responses (proposal_id, id);
+"""
+
+# Columns added to existing tables after their first release; CREATE TABLE IF
+# NOT EXISTS leaves older databases without them, so they are added on connect
+ADDED_COLUMNS = {
+    "instances": {
+        "restarts": "INTEGER NOT NULL DEFAULT 0",
+        "exit_code": "INTEGER",
+        "uptime_s": "REAL NOT NULL DEFAULT 0",
+    },
+    "tasks": {
+        "priority": "INTEGER NOT NULL DEFAULT 0",
+        "lease_expires": "REAL",
+        "created_at": "TEXT",
+    },
+}
+
+# Indexes over added columns, created once the columns exist. They lead with
+# status, so the queue head and the oldest expired lease are each one index
+# seek however long the completed history grows
+ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS tasks_queue ON tasks (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS tasks_lease ON tasks (status, lease_expires);
+"""
+
+# Shared memory sections (the keys of the old .shared_memory.json)
+FINDING_KINDS = ("findings", "decisions", "learnings")
+
+# Text timestamp columns. They are compared as strings (ranges, ordering), so
+# all of them hold UTC ISO timestamps with an explicit +00:00 offset
+TIMESTAMP_COLUMNS = {
+    "instances": ("started_at", "last_heartbeat"),
+    "messages": ("timestamp",),
+    "findings": ("timestamp",),
+    "tasks": ("claimed_at", "completed_at", "created_at"),
+    "task_updates": ("timestamp",),
+    "questions": ("timestamp",),
+    "responses": ("timestamp",),
+    "proposals": ("created_at",),
+    "proposal_responses": ("timestamp",),
+}
+
+# Recipients every instance sees besides its own id: broadcasts, and task and
+# question activity (posted by coordinate.py and instance_wait.py)
+SHARED_TOPICS = ("broadcast", "tasks", "questions")
+
+
+logger = logging.getLogger(__name__)
+
+
+def _records(data: Any, key: str, required: tuple[str, ...] = ()) -> Iterator[dict[str, Any]]:
+    """The dicts under `data[key]` in a legacy JSON file, skipping malformed entries."""
+    items = data.get(key, []) if isinstance(data, dict) else []
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and all(item.get(field) for field in required):
+            yield item
+        else:
+            logger.warning("Skipping malformed %s record: %.200r", key, item)
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+def _utc(value: str | None) -> str | None:
+    """An ISO timestamp in the store's format (aware UTC); naive ones are already UTC."""
+    if not value:
+        return value
+    try:
+        stamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+    if stamp.tzinfo is None:
+        # The old tools wrote datetime.utcnow(), which carries no offset
+        stamp = stamp.replace(tzinfo=UTC)
+    return stamp.astimezone(UTC).isoformat()
+
+
+class SharedStore:
+    """Typed access to the shared state database.
+
+    One connection per store, guarded by a lock so the harness can use it
+    from worker threads. Open one store per process and reuse it.
+    """
+
+    def __init__(self, path: Path, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+
+    @classmethod
+    def for_workspace(cls, workspace: Path | str | None = None) -> "SharedStore":
+        workspace = Path(workspace or os.environ.get("BOB_WORKSPACE", "/bob"))
+        return cls(workspace / DB_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(SCHEMA)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, decl in columns.items():
+                if name in existing:
+                    continue
+                try:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+                except sqlite3.OperationalError as e:
+                    if "duplicate column" not in str(e):  # another process added it first
+                        raise
+        conn.executescript(ADDED_INDEXES)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Serialized write transaction (BEGIN IMMEDIATE takes the write lock up front)."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+                self._migrate(self._conn)
+                self._normalize_timestamps(self._conn)
+                self._archive_completed(self._conn)
+                self._lease_unleased(self._conn)
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            if self._conn is None:
+                with self.transaction():
+                    pass
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # Instance registry
+
+    def reset_instances(self) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM instances")
+            conn.execute("DELETE FROM heartbeats")
+
+    def register_instance(self, info: dict[str, Any]) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO instances"
+                " (instance_id, role, pid, started_at, status, last_heartbeat, restarts, uptime_s)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (info["instance_id"], info["role"], info.get("pid"), info["started_at"],
+                 info.get("status", "starting"), info.get("last_heartbeat", ""),
+                 info.get("restarts", 0), info.get("uptime_s", 0.0)),
+            )
+            # Registration counts as the first beat, so a harness that never
+            # comes up still goes stale
+            conn.execute(
+                "INSERT OR REPLACE INTO heartbeats (instance_id, pid, status, beat_at)"
+                " VALUES (?, ?, ?, ?)",
+                (info["instance_id"], info.get("pid"), info.get("status", "starting"), time.time()),
+            )
+
+    def update_instance_status(self, instance_id: str, status: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("UPDATE instances SET status = ? WHERE instance_id = ?", (status, instance_id))
+
+    def record_restart(self, instance_id: str, pid: int, started_at: str) -> None:
+        """A supervised instance was started again: new pid and run, one more restart."""
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE instances SET pid = ?, started_at = ?, status = 'running',"
+                " restarts = restarts + 1 WHERE instance_id = ?",
+                (pid, started_at, instance_id),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO heartbeats (instance_id, pid, status, beat_at) VALUES (?, ?, ?, ?)",
+                (instance_id, pid, "starting", time.time()),
+            )
+
+    def record_exit(self, instance_id: str, exit_code: int | None, run_seconds: float,
+                    status: str = "exited") -> None:
+        """Record a finished run: its exit code, and its time added to the instance's uptime."""
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE instances SET status = ?, exit_code = ?, uptime_s = uptime_s + ?"
+                " WHERE instance_id = ?",
+                (status, exit_code, run_seconds, instance_id),
+            )
+
+    def heartbeat(self, instance_id: str, pid: int, status: str, iteration: int,
+                  current_task: str, rss_kb: int) -> None:
+        """Overwrite the instance's heartbeat row (the registry itself is not touched)."""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO heartbeats VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (instance_id, pid, status, iteration, current_task, rss_kb, time.time()),
+            )
+
+    def mark_stale(self, timeout: float) -> tuple[list[str], list[str]]:
+        """Flag running instances whose last beat is older than `timeout` seconds as stale,
+        and stale ones that are beating again as running. Returns (stale, revived) ids."""
+        cutoff = time.time() - timeout
+        with self.transaction() as conn:
+            stale = [row[0] for row in conn.execute(
+                "SELECT i.instance_id FROM instances i JOIN heartbeats h USING (instance_id)"
+                " WHERE i.status = 'running' AND h.beat_at < ?", (cutoff,)
+            )]
+            revived = [row[0] for row in conn.execute(
+                "SELECT i.instance_id FROM instances i JOIN heartbeats h USING (instance_id)"
+                " WHERE i.status = 'stale' AND h.beat_at >= ?", (cutoff,)
+            )]
+            for instance_id in stale:
+                conn.execute("UPDATE instances SET status = 'stale' WHERE instance_id = ?", (instance_id,))
+            for instance_id in revived:
+                conn.execute("UPDATE instances SET status = 'running' WHERE instance_id = ?", (instance_id,))
+        return stale, revived
+
+    def instances(self) -> list[dict[str, Any]]:
+        """Registered instances with their latest heartbeat (`heartbeat_age` in seconds)."""
+        rows = self._query(
+            "SELECT i.instance_id, i.role, i.pid, i.started_at, i.status, i.restarts, i.exit_code,"
+            " i.uptime_s, h.status AS activity, h.iteration, h.current_task, h.rss_kb, h.beat_at"
+            " FROM instances i LEFT JOIN heartbeats h USING (instance_id) ORDER BY i.started_at"
+        )
+        now = time.time()
+        instances = []
+        for row in rows:
+            info = dict(row)
+            beat_at = info.pop("beat_at")
+            info["last_heartbeat"] = datetime.fromtimestamp(beat_at, UTC).isoformat() if beat_at else ""
+            info["heartbeat_age"] = round(now - beat_at, 1) if beat_at else None
+            if info["status"] in ("starting", "running", "stale") and info["started_at"]:
+                # Finished runs are in uptime_s; add the one in progress
+                try:
+                    started = datetime.fromisoformat(info["started_at"]).timestamp()
+                    info["uptime_s"] += max(0.0, now - started)
+                except ValueError:
+                    pass
+            info["uptime_s"] = round(info["uptime_s"], 1)
+            instances.append(info)
+        return instances
+
+    # Messages
+
+    @staticmethod
+    def _message(row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "seq": row["seq"],
+            "from": row["sender"],
+            "to": row["recipient"],
+            "type": row["type"],
+            "content": row["content"],
+            "timestamp": row["timestamp"],
+            "metadata": json.loads(row["metadata"]),
+        }
+
+    def post_message(self, sender: str, to: str, msg_type: str, content: str,
+                     metadata: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Post a message; returns the record with its assigned seq."""
+        timestamp = _now()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (sender, recipient, type, content, timestamp, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (sender, to, msg_type, content, timestamp, json.dumps(metadata or {})),
+            )
+        return {"seq": cursor.lastrowid, "from": sender, "to": to, "type": msg_type,
+                "content": content, "timestamp": timestamp, "metadata": metadata or {}}
+
+    def messages_after(self, seq: int, instance_id: str | None = None,
+                       limit: int = 1000) -> list[dict[str, Any]]:
+        """Messages with a seq above `seq`; only those an instance sees if one is given."""
+        recipients = None if instance_id is None else (*SHARED_TOPICS, instance_id)
+        return self.messages_for(recipients, seq, limit)
+
+    def messages_for(self, recipients: tuple[str, ...] | None, seq: int = 0,
+                     limit: int = 1000) -> list[dict[str, Any]]:
+        """Messages to any of `recipients` (every message if None) with a seq above `seq`."""
+        if recipients is None:
+            rows = self._query(
+                "SELECT * FROM messages WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+            )
+        else:
+            marks = ", ".join("?" * len(recipients))
+            rows = self._query(
+                f"SELECT * FROM messages WHERE seq > ? AND recipient IN ({marks})"
+                " ORDER BY seq LIMIT ?",
+                (seq, *recipients, limit),
+            )
+        return [self._message(row) for row in rows]
+
+    def recent_messages(self, count: int, sender: str | None = None,
+                        instance_id: str | None = None) -> list[dict[str, Any]]:
+        """The last `count` messages, oldest first, optionally filtered."""
+        where, params = [], []
+        if sender is not None:
+            where.append("sender = ?")
+            params.append(sender)
+        if instance_id is not None:
+            where.append(f"recipient IN ({', '.join('?' * (len(SHARED_TOPICS) + 1))})")
+            params += [*SHARED_TOPICS, instance_id]
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        rows = self._query(
+            f"SELECT * FROM messages {clause} ORDER BY seq DESC LIMIT ?", (*params, count)
+        )
+        return [self._message(row) for row in reversed(rows)]
+
+    def last_message_seq(self) -> int:
+        return self._query("SELECT COALESCE(MAX(seq), 0) FROM messages")[0][0]
+
+    # Shared memory
+
+    def add_finding(self, instance_id: str, content: str, kind: str = "findings") -> None:
+        if kind not in FINDING_KINDS:
+            raise ValueError(f"Unknown shared memory section: {kind}")
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO findings (kind, instance, timestamp, content) VALUES (?, ?, ?, ?)",
+                (kind, instance_id, _now(), content),
+            )
+
+    def findings(self, kind: str = "findings", count: int = 500) -> list[dict[str, Any]]:
+        rows = self._query(
+            "SELECT instance, timestamp, content FROM findings WHERE kind = ?"
+            " ORDER BY id DESC LIMIT ?",
+            (kind, count),
+        )
+        return [dict(row) for row in reversed(rows)]
+
+    # Coordination tasks (tools/coordinate.py)
+
+    def _tasks(self, rows: list[sqlite3.Row]) -> list[dict[str, Any]]:
+        """Task records with their updates, fetched in one query for all rows."""
+        tasks = [{key: row[key] for key in row.keys() if row[key] is not None} for row in rows]
+        updates: dict[str, list[dict[str, Any]]] = {task["task_id"]: [] for task in tasks}
+        if updates:
+            for update in self._query(
+                "SELECT task_id, timestamp, content FROM task_updates"
+                " WHERE task_id IN (SELECT value FROM json_each(?)) ORDER BY id",
+                (json.dumps(list(updates)),),
+            ):
+                updates[update["task_id"]].append(
+                    {"timestamp": update["timestamp"], "content": update["content"]}
+                )
+        for task in tasks:
+            task["updates"] = updates[task["task_id"]]
+        return tasks
+
+    def add_task(self, task_id: str, description: str, priority: int = 0) -> dict[str, Any] | None:
+        """Queue an unclaimed task; returns the existing task if the id is still open."""
+        with self.transaction() as conn:
+            existing = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if existing is not None:
+                return dict(existing)
+            conn.execute(
+                "INSERT INTO tasks"
+                " (task_id, description, claimed_by, claimed_at, status, priority, created_at)"
+                " VALUES (?, ?, '', '', 'pending', ?, ?)",
+                (task_id, description, priority, _now()),
+            )
+        return None
+
+    @staticmethod
+    def _take_task(conn: sqlite3.Connection, task: sqlite3.Row, instance_id: str,
+                   lease: float) -> dict[str, Any]:
+        """Give `task` to `instance_id` under a fresh lease (inside a transaction)."""
+        now, expires = _now(), time.time() + lease
+        conn.execute(
+            "UPDATE tasks SET claimed_by = ?, claimed_at = ?, status = 'in_progress',"
+            " lease_expires = ? WHERE task_id = ?",
+            (instance_id, now, expires, task["task_id"]),
+        )
+        claimed = dict(task)
+        if task["status"] == "in_progress" and task["claimed_by"] != instance_id:
+            claimed["stolen_from"] = task["claimed_by"]
+            conn.execute(
+                "INSERT INTO task_updates (task_id, timestamp, content) VALUES (?, ?, ?)",
+                (task["task_id"], now, f"Lease of {task['claimed_by']} expired; reclaimed by {instance_id}"),
+            )
+        claimed.update(claimed_by=instance_id, claimed_at=now, status="in_progress",
+                       lease_expires=expires)
+        return claimed
+
+    def claim_task(self, task_id: str, description: str, instance_id: str, lease: float,
+                   priority: int = 0) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+        """Claim a task by id for `lease` seconds.
+
+        Queued tasks and tasks whose lease expired can be claimed; claiming
+        your own task renews its lease. Returns (claimed, conflict): the
+        claimed task (with "stolen_from" if it was reclaimed), or the task
+        someone else holds.
+        """
+        with self.transaction() as conn:
+            existing = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if existing is None:
+                now = _now()
+                conn.execute(
+                    "INSERT INTO tasks (task_id, description, claimed_by, claimed_at,"
+                    " status, priority, lease_expires, created_at)"
+                    " VALUES (?, ?, ?, ?, 'in_progress', ?, ?, ?)",
+                    (task_id, description, instance_id, now, priority, time.time() + lease, now),
+                )
+                row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+                return dict(row), None
+            expired = existing["lease_expires"] is not None and existing["lease_expires"] < time.time()
+            if existing["status"] == "pending" or existing["claimed_by"] == instance_id or expired:
+                return self._take_task(conn, existing, instance_id, lease), None
+            return None, dict(existing)
+
+    def next_task(self, instance_id: str, lease: float) -> dict[str, Any] | None:
+        """Atomically take the highest-priority open task, or None if there is none.
+
+        Candidates are the head of the queue and the task whose lease expired
+        longest ago (work stealing from crashed or stuck instances); the
+        higher priority wins, ties going to the reclaimed task since it was
+        started first.
+        """
+        with self.transaction() as conn:
+            queued = conn.execute(
+                "SELECT * FROM tasks WHERE status = 'pending'"
+                " ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            expired = conn.execute(
+                "SELECT * FROM tasks WHERE status = 'in_progress' AND lease_expires < ?"
+                " ORDER BY lease_expires LIMIT 1",
+                (time.time(),),
+            ).fetchone()
+            candidates = [task for task in (expired, queued) if task is not None]
+            if not candidates:
+                return None
+            task = max(candidates, key=lambda task: task["priority"])
+            return self._take_task(conn, task, instance_id, lease)
+
+    def update_task(self, task_id: str, instance_id: str, content: str, lease: float) -> bool:
+        """Record progress on an owned task and renew its lease."""
+        with self.transaction() as conn:
+            renewed = conn.execute(
+                "UPDATE tasks SET lease_expires = ?"
+                " WHERE task_id = ? AND claimed_by = ? AND status = 'in_progress'",
+                (time.time() + lease, task_id, instance_id),
+            )
+            if renewed.rowcount == 0:
+                return False
+            conn.execute(
+                "INSERT INTO task_updates (task_id, timestamp, content) VALUES (?, ?, ?)",
+                (task_id, _now(), content),
+            )
+        return True
+
+    @staticmethod
+    def _archive_task(conn: sqlite3.Connection, task: sqlite3.Row, completed_at: str,
+                      result: str | None) -> dict[str, Any]:
+        """Move a task and its updates into the archive (inside a transaction)."""
+        updates = [
+            dict(update) for update in conn.execute(
+                "SELECT timestamp, content FROM task_updates WHERE task_id = ? ORDER BY id",
+                (task["task_id"],),
+            )
+        ]
+        conn.execute(
+            "INSERT OR REPLACE INTO task_archive (month, completed_at, task_id, description,"
+            " claimed_by, claimed_at, priority, created_at, result, updates)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (completed_at[:7], completed_at, task["task_id"], task["description"],
+             task["claimed_by"], task["claimed_at"], task["priority"], task["created_at"],
+             result, json.dumps(updates)),
+        )
+        conn.execute("DELETE FROM task_updates WHERE task_id = ?", (task["task_id"],))
+        conn.execute("DELETE FROM tasks WHERE task_id = ?", (task["task_id"],))
+        archived = {key: task[key] for key in task.keys() if task[key] is not None}
+        archived.update(status="completed", completed_at=completed_at, updates=updates,
+                        lease_expires=None)
+        if result:
+            archived["result"] = result
+        return archived
+
+    def _archive_completed(self, conn: sqlite3.Connection) -> None:
+        """Archive tasks completed before the archive existed (or imported from JSON)."""
+        if conn.execute("SELECT 1 FROM tasks WHERE status = 'completed' LIMIT 1").fetchone() is None:
+            return
+        with self.transaction():
+            for task in conn.execute("SELECT * FROM tasks WHERE status = 'completed'").fetchall():
+                self._archive_task(conn, task, task["completed_at"] or task["claimed_at"], task["result"])
+
+    def _lease_unleased(self, conn: sqlite3.Connection) -> None:
+        """Give claims made before leases existed (or imported from JSON) a lease
+        from now, so a crashed owner loses them like any other claim."""
+        if conn.execute(
+            "SELECT 1 FROM tasks WHERE status = 'in_progress' AND lease_expires IS NULL LIMIT 1"
+        ).fetchone() is None:
+            return
+        with self.transaction():
+            conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE status = 'in_progress' AND lease_expires IS NULL",
+                (time.time() + TASK_LEASE_SECONDS,),
+            )
+
+    def complete_task(self, task_id: str, instance_id: str, result: str = "") -> dict[str, Any] | None:
+        """Archive an owned task as completed; returns it, or None if not found / not owned."""
+        with self.transaction() as conn:
+            task = conn.execute(
+                "SELECT * FROM tasks WHERE task_id = ? AND claimed_by = ? AND status = 'in_progress'",
+                (task_id, instance_id),
+            ).fetchone()
+            if task is None:
+                return None
+            return self._archive_task(conn, task, _now(), result or None)
+
+    def tasks(self, status: str | None = None, owner: str | None = None) -> list[dict[str, Any]]:
+        """Open tasks (queued or in progress), optionally by status and owner."""
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if owner is not None:
+            clauses.append("claimed_by = ?")
+            params.append(owner)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(f"SELECT * FROM tasks{where} ORDER BY claimed_at", tuple(params))
+        return self._tasks(rows)
+
+    def archived_tasks(self, since: str | None = None, before: str | None = None,
+                       owner: str | None = None, limit: int = 50) -> list[dict[str, Any]]:
+        """Completed tasks, newest first, completed in [since, before).
+
+        Bounds are UTC ISO dates or timestamps ("2026-10", "2026-10-18",
+        "2026-10-18T12:00"); only the months they span are read.
+        """
+        clauses = ["month BETWEEN ? AND ?", "completed_at >= ?"]
+        params: list[Any] = [(since or "")[:7], (before or "9999")[:7], since or ""]
+        if before is not None:
+            clauses.append("completed_at < ?")
+            params.append(before)
+        if owner is not None:
+            clauses.append("claimed_by = ?")
+            params.append(owner)
+        rows = self._query(
+            f"SELECT * FROM task_archive WHERE {' AND '.join(clauses)}"
+            " ORDER BY month DESC, completed_at DESC LIMIT ?",
+            (*params, limit),
+        )
+        tasks = []
+        for row in rows:
+            task = {key: row[key] for key in row.keys() if row[key] is not None and key != "month"}
+            task.update(status="completed", updates=json.loads(row["updates"]))
+            tasks.append(task)
+        return tasks
+
+    # Questions (tools/instance_wait.py)
+
+    def _question(self, row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "question_id": row["question_id"],
+            "from": row["sender"],
+            "to": row["recipient"],
+            "question": row["question"],
+            "timestamp": row["timestamp"],
+            "status": row["status"],
+            "responses": self.responses(row["question_id"]),
+        }
+
+    def ask(self, question_id: str, sender: str, to: str, question: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM responses WHERE question_id = ?", (question_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO questions VALUES (?, ?, ?, ?, ?, 'open')",
+                (question_id, sender, to, question, _now()),
+            )
+
+    def respond(self, question_id: str, sender: str, response: str) -> str | None:
+        """Record a response; returns who asked the question, or None if it doesn't exist."""
+        with self.transaction() as conn:
+            question = conn.execute(
+                "SELECT sender FROM questions WHERE question_id = ?", (question_id,)
+            ).fetchone()
+            if question is None:
+                return None
+            conn.execute(
+                "INSERT INTO responses (question_id, sender, response, timestamp) VALUES (?, ?, ?, ?)",
+                (question_id, sender, response, _now()),
+            )
+        return question["sender"]
+
+    def responses(self, question_id: str) -> list[dict[str, Any]]:
+        rows = self._query(
+            "SELECT sender, response, timestamp FROM responses WHERE question_id = ? ORDER BY id",
+            (question_id,),
+        )
+        return [{"from": row["sender"], "response": row["response"], "timestamp": row["timestamp"]}
+                for row in rows]
+
+    def set_question_status(self, question_id: str, status: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("UPDATE questions SET status = ? WHERE question_id = ?", (status, question_id))
+
+    def open_questions(self, instance_id: str) -> list[dict[str, Any]]:
+        """Open questions addressed to `instance_id` (or broadcast) from other instances."""
+        rows = self._query(
+            "SELECT * FROM questions WHERE status = 'open' AND recipient IN ('broadcast', ?)"
+            " AND sender != ? ORDER BY timestamp",
+            (instance_id, instance_id),
+        )
+        return [self._question(row) for row in rows]
+
+    def questions(self) -> list[dict[str, Any]]:
+        return [self._question(row) for row in self._query("SELECT * FROM questions ORDER BY timestamp")]
+
+    def prune_questions(self, closed_before: str, open_before: str) -> int:
+        """Delete answered/expired questions asked before `closed_before`, and open
+        ones asked before `open_before` (ISO timestamps); returns how many."""
+        with self.transaction() as conn:
+            stale = [
+                row["question_id"] for row in conn.execute(
+                    "SELECT question_id FROM questions WHERE status IN ('answered', 'expired')"
+                    " AND timestamp < ?"
+                    " UNION ALL SELECT question_id FROM questions WHERE status = 'open'"
+                    " AND timestamp < ?",
+                    (closed_before, open_before),
+                )
+            ]
+            for question_id in stale:
+                conn.execute("DELETE FROM responses WHERE question_id = ?", (question_id,))
+                conn.execute("DELETE FROM questions WHERE question_id = ?", (question_id,))
+        return len(stale)
+
+    # Proposals (tools/propose.py)
+
+    def _proposal(self, row: sqlite3.Row) -> dict[str, Any]:
+        proposal = dict(row)
+        proposal["claimed_by"] = [
+            claim["instance_id"] for claim in self._query(
+                "SELECT instance_id FROM proposal_claims WHERE proposal_id = ? ORDER BY rowid",
+                (row["id"],),
+            )
+        ]
+        proposal["responses"] = [
+            dict(response) for response in self._query(
+                "SELECT timestamp, message FROM proposal_responses WHERE proposal_id = ? ORDER BY id",
+                (row["id"],),
+            )
+        ]
+        return proposal
+
+    def create_proposal(self, question: str, description: str = "") -> str:
+        with self.transaction() as conn:
+            # Highest number in use, not the count: imported ids can have gaps
+            last = conn.execute(
+                "SELECT COALESCE(MAX(CAST(substr(id, 6) AS INTEGER)), 0) FROM proposals"
+                " WHERE id LIKE 'prop!_%' ESCAPE '!'"
+            ).fetchone()[0]
+            proposal_id = f"prop_{last + 1:03d}"
+            conn.execute(
+                "INSERT INTO proposals VALUES (?, ?, ?, 'open', ?)",
+                (proposal_id, question, description, _now()),
+            )
+        return proposal_id
+
+    def claim_proposal(self, proposal_id: str, instance_id: str) -> bool:
+        with self.transaction() as conn:
+            exists = conn.execute("SELECT 1 FROM proposals WHERE id = ?", (proposal_id,)).fetchone()
+            if exists is None:
+                return False
+            conn.execute(
+                "INSERT OR IGNORE INTO proposal_claims VALUES (?, ?)", (proposal_id, instance_id)
+            )
+            conn.execute(
+                "UPDATE proposals SET status = 'claimed' WHERE id = ? AND status = 'open'",
+                (proposal_id,),
+            )
+        return True
+
+    def set_proposal_status(self, proposal_id: str, status: str) -> bool:
+        with self.transaction() as conn:
+            updated = conn.execute(
+                "UPDATE proposals SET status = ? WHERE id = ?", (status, proposal_id)
+            )
+        return updated.rowcount > 0
+
+    def add_proposal_response(self, proposal_id: str, message: str) -> bool:
+        with self.transaction() as conn:
+            exists = conn.execute("SELECT 1 FROM proposals WHERE id = ?", (proposal_id,)).fetchone()
+            if exists is None:
+                return False
+            conn.execute(
+                "INSERT INTO proposal_responses (proposal_id, timestamp, message) VALUES (?, ?, ?)",
+                (proposal_id, _now(), message),
+            )
+        return True
+
+    def proposals(self, status: str | None = None) -> list[dict[str, Any]]:
+        if status is None:
+            rows = self._query("SELECT * FROM proposals ORDER BY created_at")
+        else:
+            rows = self._query("SELECT * FROM proposals WHERE status = ? ORDER BY created_at", (status,))
+        return [self._proposal(row) for row in rows]
+
+    # Resource samples (multi_harness.py sampler)
+
+    def add_resource_samples(self, samples: list[dict[str, Any]], keep_seconds: float) -> None:
+        """Append one sample per instance and drop those older than `keep_seconds`."""
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO resource_samples"
+                " VALUES (:instance_id, :ts, :cpu_pct, :cpu_s, :rss_kb, :fds, :threads, :procs)",
+                samples,
+            )
+            conn.execute("DELETE FROM resource_samples WHERE ts < ?", (int(time.time() - keep_seconds),))
+
+    def resource_samples(self, since: float) -> dict[str, list[dict[str, Any]]]:
+        """Samples newer than the unix time `since`, oldest first, grouped by instance."""
+        series: dict[str, list[dict[str, Any]]] = {}
+        for row in self._query(
+            "SELECT * FROM resource_samples WHERE ts >= ? ORDER BY instance_id, ts", (int(since),)
+        ):
+            sample = dict(row)
+            series.setdefault(sample.pop("instance_id"), []).append(sample)
+        return series
+
+    # Demand (multi_harness.py autoscaling)
+
+    def backlog(self) -> dict[str, int]:
+        """Counts of outstanding work: queued and claimed tasks, and proposals by status."""
+        counts = {"tasks": 0, "proposals_open": 0, "proposals_active": 0}
+        for (count,) in self._query("SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'in_progress')"):
+            counts["tasks"] = count
+        for status, count in self._query(
+            "SELECT status, COUNT(*) FROM proposals WHERE status != 'complete' GROUP BY status"
+        ):
+            counts["proposals_open" if status == "open" else "proposals_active"] += count
+        return counts
+
+    # Migration from the JSON files
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Import the old JSON files next to the database, once."""
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+            return
+
+        workspace = self.path.parent
+        importers = {
+            ".instance_registry.json": self._import_registry,
+            # The log keeps its seq numbers; messages from the older JSON file get new ones
+            ".shared_messages.jsonl": self._import_message_log,
+            ".shared_messages.json": self._import_messages,
+            ".shared_memory.json": self._import_memory,
+            ".shared_tasks.json": self._import_tasks,
+            ".instance_wait.json": self._import_questions,
+            ".proposals.json": self._import_proposals,
+        }
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+                conn.execute("ROLLBACK")
+                return
+            imported = []
+            for name, importer in importers.items():
+                source = workspace / name
+                if not source.exists():
+                    continue
+                try:
+                    text = source.read_text()
+                    data = [json.loads(line) for line in text.splitlines() if line.strip()] \
+                        if name.endswith(".jsonl") else json.loads(text)
+                except (json.JSONDecodeError, OSError):
+                    continue
+                # One bad file must not block the store: undo just its rows and keep it in place
+                conn.execute("SAVEPOINT import_file")
+                try:
+                    importer(conn, data)
+                except (sqlite3.Error, TypeError, ValueError, AttributeError) as e:
+                    conn.execute("ROLLBACK TO import_file")
+                    logger.warning("Could not import %s: %s", source, e)
+                    continue
+                finally:
+                    conn.execute("RELEASE import_file")
+                imported.append(source)
+            conn.execute("INSERT INTO meta VALUES ('migrated', ?)", (_now(),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        # Only rename once the import is committed
+        for source in imported:
+            source.replace(source.with_name(source.name + ".migrated"))
+
+    def _normalize_timestamps(self, conn: sqlite3.Connection) -> None:
+        """Rewrite imported and pre-UTC timestamps as UTC, once.
+
+        The JSON files carried naive UTC stamps from datetime.utcnow(); next
+        to "+00:00" ones they compare wrongly as strings.
+        """
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'utc_timestamps'").fetchone():
+            return
+        conn.create_function("utc_iso", 1, _utc, deterministic=True)
+        with self.transaction():
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'utc_timestamps'").fetchone():
+                return  # another process got there first
+            for table, columns in TIMESTAMP_COLUMNS.items():
+                for column in columns:
+                    conn.execute(
+                        f"UPDATE {table} SET {column} = utc_iso({column})"
+                        f" WHERE {column} != '' AND {column} NOT LIKE '%+00:00'"
+                    )
+            conn.execute(
+                "UPDATE task_archive SET completed_at = utc_iso(completed_at),"
+                " month = substr(utc_iso(completed_at), 1, 7), claimed_at = utc_iso(claimed_at),"
+                " created_at = utc_iso(created_at) WHERE completed_at NOT LIKE '%+00:00'"
+            )
+            conn.execute("INSERT INTO meta VALUES ('utc_timestamps', ?)", (_now(),))
+
+    @staticmethod
+    def _import_registry(conn: sqlite3.Connection, data: dict[str, Any]) -> None:
+        for inst in _records(data, "instances", ("instance_id",)):
+            conn.execute(
+                "INSERT OR REPLACE INTO instances"
+                " (instance_id, role, pid, started_at, status, last_heartbeat) VALUES (?, ?, ?, ?, ?, ?)",
+                (inst["instance_id"], inst.get("role", ""), inst.get("pid"),
+                 inst.get("started_at", ""), inst.get("status", ""), inst.get("last_heartbeat", "")),
+            )
+
+    @staticmethod
+    def _import_message_rows(conn: sqlite3.Connection, messages: Iterable[dict[str, Any]]) -> None:
+        for msg in messages:
+            conn.execute(
+                "INSERT OR IGNORE INTO messages"
+                " (seq, sender, recipient, type, content, timestamp, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (msg.get("seq"), msg.get("from", ""), msg.get("to", "broadcast"),
+                 msg.get("type", "info"), msg.get("content", ""), msg.get("timestamp", ""),
+                 json.dumps(msg.get("metadata") or {})),
+            )
+
+    def _import_messages(self, conn: sqlite3.Connection, data: dict[str, Any]) -> None:
+        self._import_message_rows(
+            conn, [{**msg, "seq": None} for msg in _records(data, "messages")]
+        )
+
+    def _import_message_log(self, conn: sqlite3.Connection, data: list[dict[str, Any]]) -> None:
+        self._import_message_rows(conn, _records({"messages": data}, "messages"))
+
+    @staticmethod
+    def _import_memory(conn: sqlite3.Connection, data: dict[str, Any]) -> None:
+        if not isinstance(data, dict):
+            logger.warning("Skipping malformed shared memory: %.200r", data)
+            return
+        for kind in FINDING_KINDS:
+            items = data.get(kind)
+            for item in items if isinstance(items, list) else []:
+                # Entries were dicts, or bare strings in the earliest files
+                if not isinstance(item, dict):
+                    item = {"content": str(item)}
+                conn.execute(
+                    "INSERT INTO findings (kind, instance, timestamp, content) VALUES (?, ?, ?, ?)",
+                    (kind, item.get("instance", ""), item.get("timestamp", ""),
+                     str(item.get("content", ""))),
+                )
+
+    @staticmethod
+    def _import_tasks(conn: sqlite3.Connection, data: dict[str, Any]) -> None:
+        for task in _records(data, "tasks", ("task_id",)):
+            conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, description, claimed_by, claimed_at,"
+                " status, completed_at, result) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task["task_id"], task.get("description", ""), task.get("claimed_by", ""),
+                 task.get("claimed_at", ""), task.get("status", "in_progress"),
+                 task.get("completed_at"), task.get("result")),
+            )
+            for update in _records(task, "updates"):
+                conn.execute(
+                    "INSERT INTO task_updates (task_id, timestamp, content) VALUES (?, ?, ?)",
+                    (task["task_id"], update.get("timestamp", ""), update.get("content", "")),
+                )
+
+    @staticmethod
+    def _import_questions(conn: sqlite3.Connection, data: dict[str, Any]) -> None:
+        for q in _records(data, "questions", ("question_id",)):
+            conn.execute(
+                "INSERT OR REPLACE INTO questions VALUES (?, ?, ?, ?, ?, ?)",
+                (q["question_id"], q.get("from", ""), q.get("to", "broadcast"),
+                 q.get("question", ""), q.get("timestamp", ""), q.get("status", "open")),
+            )
+            for resp in _records(q, "responses"):
+                conn.execute(
+                    "INSERT INTO responses (question_id, sender, response, timestamp) VALUES (?, ?, ?, ?)",
+                    (q["question_id"], resp.get("from", ""), resp.get("response", ""),
+                     resp.get("timestamp", "")),
+                )
+
+    @staticmethod
+    def _import_proposals(conn: sqlite3.Connection, data: dict[str, Any]) -> None:
+        for p in _records(data, "proposals", ("id",)):
+            conn.execute(
+                "INSERT OR REPLACE INTO proposals VALUES (?, ?, ?, ?, ?)",
+                (p["id"], p.get("question", ""), p.get("description", ""),
+                 p.get("status", "open"), p.get("created_at", "")),
+            )
+            claimed_by = p.get("claimed_by")
+            for instance_id in claimed_by if isinstance(claimed_by, list) else []:
+                conn.execute("INSERT OR IGNORE INTO proposal_claims VALUES (?, ?)", (p["id"], str(instance_id)))
+            for resp in _records(p, "responses"):
+                conn.execute(
+                    "INSERT INTO proposal_responses (proposal_id, timestamp, message) VALUES (?, ?, ?)",
+                    (p["id"], resp.get("timestamp", ""), resp.get("message", "")),
+                )
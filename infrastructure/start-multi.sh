@@ -8,7 +8,7 @@ set -e
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 BOB_WORKSPACE="$(dirname "$SCRIPT_DIR")"
 
-# Default to 3 instances
+# Default to 3 instances (or pass orchestrator options, e.g. --autoscale 2 8)
 NUM_INSTANCES="${1:-3}"
 
 # Colors for output
@@ -42,4 +42,4 @@ docker run -it --rm \
     -v "$BOB_WORKSPACE:/bob" \
     -v bob-claude-credentials:/home/bob/.claude \
     -p 3141:3141 \
-    bob-harness multi $NUM_INSTANCES
+    bob-harness multi "${@:-$NUM_INSTANCES}"
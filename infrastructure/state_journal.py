@@ -0,0 +1,123 @@
+"""
+Journaled persistence for harness state.
+
+Instead of rewriting the whole state file on every change, the harness
+appends small records to a JSONL journal next to the state file:
+
+    {"seq": 41, "set": {"last_activity": "..."}}
+    {"seq": 42, "log": "[2025-12-11 10:00:00] Bob: ..."}
+
+The state file itself becomes a checkpoint: a full snapshot that is only
+rewritten when the journal is compacted. Readers (the harness on startup,
+the dashboard on every poll) rebuild the current state by replaying the
+journal records newer than the checkpoint.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from atomic_file import write_atomic
+
+
+# Journal records written before the checkpoint is compacted
+COMPACT_EVERY = 500
+
+# Log lines kept when rebuilding state
+LOG_TAIL = 100
+
+
+def journal_path(checkpoint: Path) -> Path:
+    """Journal file that belongs to a checkpoint file."""
+    return checkpoint.with_suffix(".journal.jsonl")
+
+
+class StateJournal:
+    """Append-only journal plus periodically compacted checkpoint."""
+
+    def __init__(self, checkpoint: Path, compact_every: int = COMPACT_EVERY):
+        self.checkpoint = checkpoint
+        self.path = journal_path(checkpoint)
+        self.compact_every = compact_every
+        self.seq = 0
+        self.pending = 0  # records appended since the last checkpoint
+        self.has_checkpoint = checkpoint.exists()
+
+    def encode(self, changed: dict[str, Any], logs: list[str]) -> list[str]:
+        """Turn scalar changes and new log lines into numbered journal records."""
+        lines = []
+        if changed:
+            self.seq += 1
+            lines.append(json.dumps({"seq": self.seq, "set": changed}))
+        for entry in logs:
+            self.seq += 1
+            lines.append(json.dumps({"seq": self.seq, "log": entry}))
+        self.pending += len(lines)
+        return lines
+
+    def needs_compaction(self) -> bool:
+        return not self.has_checkpoint or self.pending >= self.compact_every
+
+    def begin_compaction(self, snapshot: dict[str, Any]) -> dict[str, Any]:
+        """Stamp a snapshot with the last sequence it covers.
+
+        Resets the compaction counters immediately; the returned checkpoint
+        must be handed to write() after the records encoded so far.
+        """
+        self.pending = 0
+        self.has_checkpoint = True
+        return {**snapshot, "seq": self.seq}
+
+    def write(self, lines: list[str], checkpoint: dict[str, Any] | None = None) -> None:
+        """Append records and optionally compact. Safe to run off the event loop.
+
+        The checkpoint records the last sequence number it covers, so a crash
+        between writing it and truncating the journal only leaves records that
+        replay will skip.
+        """
+        if lines:
+            with self.path.open("a") as f:
+                f.write("\n".join(lines) + "\n")
+
+        if checkpoint is not None:
+            write_atomic(self.checkpoint, json.dumps(checkpoint, indent=2))
+            self.path.write_text("")
+
+
+def load_state(checkpoint: Path, log_tail: int = LOG_TAIL) -> tuple[dict[str, Any], int, int]:
+    """Rebuild state from checkpoint plus journal.
+
+    Returns (state dict, last sequence number, journal records replayed).
+    Missing or corrupt files yield an empty state; a torn last journal line
+    (crash mid-append) is ignored.
+    """
+    data: dict[str, Any] = {}
+    if checkpoint.exists():
+        try:
+            data = json.loads(checkpoint.read_text())
+        except json.JSONDecodeError:
+            data = {}
+
+    seq = data.pop("seq", 0)
+    logs = list(data.get("logs", []))
+    replayed = 0
+
+    path = journal_path(checkpoint)
+    if path.exists():
+        with path.open() as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("seq", 0) <= seq:
+                    continue
+                seq = record["seq"]
+                replayed += 1
+                if "set" in record:
+                    data.update(record["set"])
+                elif "log" in record:
+                    logs.append(record["log"])
+
+    data["logs"] = logs[-log_tail:]
+    return data, seq, replayed
@@ -0,0 +1,119 @@
+"""
+Stress test for concurrently updated shared files.
+
+Starts N writer processes that each post M messages while a consumer
+drains them, then checks that every message arrived exactly once:
+
+    python stress_shared.py [--writers 8] [--messages 200] [--target queue|store] [--naive]
+
+`queue` exercises the operator message file (atomic_update, as used by the
+dashboard and harness); `store` exercises shared_store.py. `--naive` runs
+the queue with the old unlocked read-modify-write to show what it loses.
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from atomic_file import atomic_update, read_json
+from shared_store import SharedStore
+
+
+def _append(data: dict, message: str) -> None:
+    data.setdefault("messages", []).append(message)
+
+
+def _take(data: dict) -> list[str]:
+    messages = data.get("messages", [])
+    data["messages"] = []
+    return messages
+
+
+def naive_append(path: Path, message: str) -> None:
+    data = read_json(path)
+    _append(data, message)
+    path.write_text(json.dumps(data, indent=2))
+
+
+def naive_take(path: Path) -> list[str]:
+    data = read_json(path)
+    messages = _take(data)
+    if messages:
+        path.write_text(json.dumps(data, indent=2))
+    return messages
+
+
+def queue_writer(path: Path, writer: int, count: int, naive: bool) -> None:
+    for i in range(count):
+        message = f"{writer}:{i}"
+        if naive:
+            naive_append(path, message)
+        else:
+            atomic_update(path, lambda data: _append(data, message))
+
+
+def store_writer(path: Path, writer: int, count: int, naive: bool) -> None:
+    store = SharedStore(path)
+    for i in range(count):
+        store.post_message(f"writer_{writer}", "broadcast", "stress", f"{writer}:{i}")
+    store.close()
+
+
+def run(target: str, writers: int, count: int, naive: bool) -> int:
+    workdir = Path(tempfile.mkdtemp(prefix="bob-stress-"))
+    if target == "queue":
+        path, worker = workdir / ".harness_messages.json", queue_writer
+    else:
+        path, worker = workdir / ".shared_state.db", store_writer
+        SharedStore(path).close()  # create the schema before the writers race
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=worker, args=(path, w, count, naive)) for w in range(writers)]
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+
+    # Drain concurrently, like the harness does while the dashboard posts
+    received: list[str] = []
+    store = SharedStore(path) if target == "store" else None
+    seq = 0
+    while True:
+        alive = any(proc.is_alive() for proc in procs)
+        if store is not None:
+            batch = store.messages_after(seq, limit=10_000)
+            if batch:
+                seq = batch[-1]["seq"]
+            received += [msg["content"] for msg in batch]
+        else:
+            received += naive_take(path) if naive else atomic_update(path, _take)
+        if not alive:
+            break
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    expected = {f"{w}:{i}" for w in range(writers) for i in range(count)}
+    lost = expected - set(received)
+    duplicated = len(received) - len(set(received))
+    total = writers * count
+    print(f"{target}{' (naive)' if naive else ''}: {writers} writers x {count} messages "
+          f"in {elapsed:.2f}s ({total / elapsed:,.0f} messages/s)")
+    print(f"  received {len(received)}/{total}, lost {len(lost)}, duplicated {duplicated}")
+    return 1 if lost or duplicated else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=8, help="Concurrent writer processes")
+    parser.add_argument("--messages", type=int, default=200, help="Messages per writer")
+    parser.add_argument("--target", choices=("queue", "store"), default="queue")
+    parser.add_argument("--naive", action="store_true", help="Unlocked read-modify-write (queue only)")
+    args = parser.parse_args()
+    sys.exit(run(args.target, args.writers, args.messages, args.naive))
+
+
+if __name__ == "__main__":
+    main()
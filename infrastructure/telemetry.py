@@ -0,0 +1,225 @@
+"""
+Per-iteration performance telemetry.
+
+The harness fills an IterationMetrics while an iteration runs and appends
+one JSON record per iteration to a metrics JSONL file. The dashboard reads
+the tail of that file and serves rolling aggregates (see aggregate()).
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Any
+
+from tracing import SpanTracker
+
+
+@dataclass
+class ToolStats:
+    """Calls, latency and output volume for one tool within an iteration."""
+
+    calls: int = 0
+    completed: int = 0
+    errors: int = 0
+    latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+    output_bytes: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "completed": self.completed,
+            "errors": self.errors,
+            "latency_ms": round(self.latency_ms, 1),
+            "max_latency_ms": round(self.max_latency_ms, 1),
+            "output_bytes": self.output_bytes,
+        }
+
+
+@dataclass
+class IterationMetrics:
+    """Metrics collected while a single iteration runs."""
+
+    iteration: int = 0
+    instance_id: str = ""
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    assistant_turns: int = 0
+    tool_calls: int = 0
+    tool_output_bytes: int = 0
+    injected_messages: int = 0
+    cancel_reason: str | None = None
+    cost_usd: float | None = None
+    usage: dict[str, Any] | None = None
+    prompt: dict[str, Any] | None = None  # Prompt.stats(): block hashes and token estimates
+    tools: dict[str, ToolStats] = field(default_factory=dict)
+
+    spans: SpanTracker = field(default_factory=SpanTracker, repr=False)
+    _start: float = field(default_factory=time.monotonic, repr=False)
+    _first_message: float | None = field(default=None, repr=False)
+
+    def message_received(self) -> None:
+        if self._first_message is None:
+            self._first_message = time.monotonic()
+            self.spans.first_message_ns = time.monotonic_ns()
+
+    def tool_started(self, tool_use_id: str | None, name: str, input_bytes: int = 0) -> None:
+        self.tool_calls += 1
+        self.tools.setdefault(name, ToolStats()).calls += 1
+        if tool_use_id:
+            self.spans.start(tool_use_id, name, input_bytes)
+
+    def tool_finished(self, tool_use_id: str | None, output_bytes: int, is_error: bool = False) -> None:
+        self.tool_output_bytes += output_bytes
+        span = self.spans.finish(tool_use_id, output_bytes, is_error) if tool_use_id else None
+        if span is None:
+            return
+        latency = span.duration_ms
+        stats = self.tools[span.name]
+        stats.completed += 1
+        stats.errors += bool(is_error)
+        stats.latency_ms += latency
+        stats.max_latency_ms = max(stats.max_latency_ms, latency)
+        stats.output_bytes += output_bytes
+
+    def to_dict(self) -> dict[str, Any]:
+        now = time.monotonic()
+        first = None if self._first_message is None else self._first_message - self._start
+        return {
+            "iteration": self.iteration,
+            "instance_id": self.instance_id,
+            "started_at": self.started_at,
+            "wall_s": round(now - self._start, 3),
+            "first_message_s": None if first is None else round(first, 3),
+            "assistant_turns": self.assistant_turns,
+            "tool_calls": self.tool_calls,
+            "tool_output_bytes": self.tool_output_bytes,
+            "unfinished_tools": self.spans.open_count,
+            "injected_messages": self.injected_messages,
+            "cancel_reason": self.cancel_reason,
+            "cost_usd": self.cost_usd,
+            "usage": self.usage,
+            "prompt": self.prompt,
+            "tools": {name: stats.to_dict() for name, stats in self.tools.items()},
+        }
+
+
+def payload_bytes(value: Any) -> int:
+    """Approximate UTF-8 size of a tool input or result without serializing it.
+
+    Counts the text in strings (and dict values) of nested structures; the
+    JSON punctuation around them is ignored.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        # isascii() is O(1) in CPython, so ASCII text is never re-encoded
+        return len(value) if value.isascii() else len(value.encode("utf-8", "replace"))
+    if isinstance(value, (list, tuple)):
+        return sum(payload_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(payload_bytes(item) for item in value.values())
+    return len(str(value))
+
+
+def rss_kb(pid: int | str = "self") -> int:
+    """Resident set size of a process in KiB (0 if it is gone or /proc is unavailable)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def append_jsonl(path: Path, record: dict[str, Any]) -> None:
+    with path.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def tail_lines(path: Path, count: int, block_size: int = 64 * 1024) -> list[str]:
+    """Last `count` lines of a file, reading backwards from the end."""
+    if count <= 0 or not path.exists():
+        return []
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", "replace").splitlines()
+    return [line for line in lines[-count:] if line.strip()]
+
+
+def read_recent(path: Path, count: int) -> list[dict[str, Any]]:
+    records = []
+    for line in tail_lines(path, count):
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+    return {
+        "avg": round(sum(values) / len(values), 3),
+        "p50": round(median(values), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def aggregate(records: list[dict[str, Any]]) -> dict[str, Any]:
+    """Rolling aggregates over a window of iteration records."""
+    tools: dict[str, dict[str, float]] = {}
+    for record in records:
+        for name, stats in record.get("tools", {}).items():
+            agg = tools.setdefault(name, {
+                "calls": 0, "completed": 0, "errors": 0,
+                "latency_ms": 0.0, "max_latency_ms": 0.0, "output_bytes": 0,
+            })
+            agg["calls"] += stats.get("calls", 0)
+            agg["completed"] += stats.get("completed", 0)
+            agg["errors"] += stats.get("errors", 0)
+            agg["latency_ms"] += stats.get("latency_ms", 0.0)
+            agg["max_latency_ms"] = max(agg["max_latency_ms"], stats.get("max_latency_ms", 0.0))
+            agg["output_bytes"] += stats.get("output_bytes", 0)
+
+    for agg in tools.values():
+        completed = agg.pop("completed")
+        latency = agg.pop("latency_ms")
+        agg["avg_latency_ms"] = round(latency / completed, 1) if completed else None
+
+    costs = [r["cost_usd"] for r in records if r.get("cost_usd") is not None]
+    prompts = [r["prompt"] for r in records if r.get("prompt")]
+    return {
+        "iterations": len(records),
+        "wall_s": _summary([r["wall_s"] for r in records if r.get("wall_s") is not None]),
+        "first_message_s": _summary(
+            [r["first_message_s"] for r in records if r.get("first_message_s") is not None]
+        ),
+        "assistant_turns": _summary([r.get("assistant_turns", 0) for r in records]),
+        "tool_calls": _summary([r.get("tool_calls", 0) for r in records]),
+        "tool_output_bytes": sum(r.get("tool_output_bytes", 0) for r in records),
+        "injected_messages": sum(r.get("injected_messages", 0) for r in records),
+        "prompt_tokens": _summary([p["tokens"] for p in prompts]),
+        "prompt_prefix_ratio": _summary([p["prefix_ratio"] for p in prompts]),
+        "cancelled": sum(1 for r in records if r.get("cancel_reason")),
+        "cost_usd": round(sum(costs), 4) if costs else None,
+        # Slowest tools first: the point of the exercise
+        "tools": dict(sorted(tools.items(), key=lambda kv: -(kv[1]["avg_latency_ms"] or 0))),
+    }
@@ -0,0 +1,45 @@
+"""
+Tests for shared_store.py.
+
+    python -m unittest discover infrastructure/tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared_store import DB_NAME, SharedStore  # noqa: E402
+
+
+class CreateProposalTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = Path(tempfile.mkdtemp(prefix="bob-store-"))
+
+    def open_store(self) -> SharedStore:
+        store = SharedStore(self.workspace / DB_NAME)
+        self.addCleanup(store.close)
+        return store
+
+    def test_numbers_continue_after_gaps_in_migrated_ids(self):
+        proposals = [
+            {"id": "prop_002", "question": "Two?", "status": "open"},
+            {"id": "prop_005", "question": "Five?", "status": "complete"},
+            {"question": "Missing id, skipped on import"},
+        ]
+        (self.workspace / ".proposals.json").write_text(json.dumps({"proposals": proposals}))
+        store = self.open_store()
+
+        self.assertEqual(store.create_proposal("Six?"), "prop_006")
+        self.assertEqual(store.create_proposal("Seven?"), "prop_007")
+        ids = [p["id"] for p in store.proposals()]
+        self.assertEqual(sorted(ids), ["prop_002", "prop_005", "prop_006", "prop_007"])
+
+    def test_first_proposal(self):
+        self.assertEqual(self.open_store().create_proposal("First?"), "prop_001")
+
+
+if __name__ == "__main__":
+    unittest.main()
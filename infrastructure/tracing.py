@@ -0,0 +1,128 @@
+"""
+Tool-call span tracing.
+
+Every tool use opens a span keyed by its tool_use id; the matching tool
+result closes it. Spans only hold a few integers, so tracing stays on by
+default. At the end of an iteration the spans are exported as a Chrome
+trace-event file that opens in chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+
+# Iteration numbers restart with every harness run; the run's start time keeps
+# each run's trace files apart
+RUN_ID = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+
+
+class Span:
+    """Timing and sizes for one tool call."""
+
+    __slots__ = ("tool_use_id", "name", "start_ns", "end_ns", "input_bytes", "output_bytes", "is_error")
+
+    def __init__(self, tool_use_id: str, name: str, start_ns: int, input_bytes: int):
+        self.tool_use_id = tool_use_id
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns: int | None = None
+        self.input_bytes = input_bytes
+        self.output_bytes = 0
+        self.is_error = False
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class SpanTracker:
+    """Open and finished tool spans for one iteration."""
+
+    def __init__(self):
+        self.origin_ns = time.monotonic_ns()
+        self.first_message_ns: int | None = None
+        self.spans: list[Span] = []
+        self._open: dict[str, Span] = {}
+
+    def start(self, tool_use_id: str, name: str, input_bytes: int = 0) -> Span:
+        span = Span(tool_use_id, name, time.monotonic_ns(), input_bytes)
+        self.spans.append(span)
+        self._open[tool_use_id] = span
+        return span
+
+    def finish(self, tool_use_id: str, output_bytes: int = 0, is_error: bool = False) -> Span | None:
+        """Close the span for a tool result; None if the tool use was not seen."""
+        span = self._open.pop(tool_use_id, None)
+        if span is not None:
+            span.end_ns = time.monotonic_ns()
+            span.output_bytes = output_bytes
+            span.is_error = is_error
+        return span
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def to_chrome_trace(self, metadata: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Chrome trace-event JSON (timestamps in microseconds)."""
+        now = time.monotonic_ns()
+        pid = os.getpid()
+
+        def us(ns: int) -> float:
+            return (ns - self.origin_ns) / 1000
+
+        events: list[dict[str, Any]] = [
+            {"name": "iteration", "cat": "iteration", "ph": "X", "ts": 0,
+             "dur": us(now), "pid": pid, "tid": 0, "args": metadata or {}},
+        ]
+        if self.first_message_ns is not None:
+            events.append({"name": "first message", "cat": "iteration", "ph": "i", "s": "p",
+                           "ts": us(self.first_message_ns), "pid": pid, "tid": 0})
+
+        # Parallel tool calls get separate lanes so they do not overlap visually
+        lane_free_at: list[int] = []
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            end = span.end_ns if span.end_ns is not None else now
+            lane = next((i for i, free in enumerate(lane_free_at) if free <= span.start_ns), None)
+            if lane is None:
+                lane = len(lane_free_at)
+                lane_free_at.append(end)
+            else:
+                lane_free_at[lane] = end
+            events.append({
+                "name": span.name,
+                "cat": "tool",
+                "ph": "X",
+                "ts": us(span.start_ns),
+                "dur": (end - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": lane + 1,
+                "args": {
+                    "tool_use_id": span.tool_use_id,
+                    "input_bytes": span.input_bytes,
+                    "output_bytes": span.output_bytes,
+                    "is_error": span.is_error,
+                    "finished": span.end_ns is not None,
+                },
+            })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_trace(trace_dir: Path, iteration: int, trace: dict[str, Any], keep: int = 50,
+                 run_id: str = RUN_ID) -> Path:
+    """Write one iteration's trace and prune all but the newest `keep` files."""
+    trace_dir.mkdir(exist_ok=True)
+    path = trace_dir / f"{run_id}_iteration_{iteration:05d}.json"
+    path.write_text(json.dumps(trace))
+
+    # Also matches the files of older versions, named without a run id
+    traces = sorted(trace_dir.glob("*iteration_*.json"), key=lambda p: p.stat().st_mtime)
+    for old in traces[:-keep]:
+        old.unlink(missing_ok=True)
+    return path
@@ -0,0 +1,195 @@
+"""
+In-process warmup report.
+
+Python port of tools/warmup.sh so the harness can inline the report into
+the iteration prompt instead of having Bob spend a tool round-trip running
+the script. Each section is cached: git sections on HEAD (resolved by
+reading .git directly) and the session marker, memory sections on file
+mtimes, so rebuilding an unchanged report costs a handful of stat() calls.
+"""
+
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class WarmupEngine:
+    """Builds the warmup report for a workspace, caching unchanged sections."""
+
+    def __init__(self, workspace: Path):
+        self.workspace = workspace
+        self.git_dir = workspace / ".git"
+        self.marker = workspace / ".last-session-marker"
+        self.next_message = workspace / ".next-instance-message"
+        self.last_message = workspace / ".last-instance-message"
+        self.memories = workspace / "memories"
+        self._cache: dict[str, tuple[object, str]] = {}
+        self._report_head = ""
+        self._report_message: tuple[int, int] | None = None
+
+    def _cached(self, name: str, key: object, build) -> str:
+        hit = self._cache.get(name)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        text = build()
+        self._cache[name] = (key, text)
+        return text
+
+    def _git(self, *args: str) -> str:
+        try:
+            result = subprocess.run(
+                ["git", *args], cwd=self.workspace, capture_output=True, text=True, timeout=30
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return ""
+        return result.stdout.strip() if result.returncode == 0 else ""
+
+    def head(self) -> str:
+        """Current commit, read from .git without spawning git when possible."""
+        try:
+            ref = (self.git_dir / "HEAD").read_text().strip()
+            if not ref.startswith("ref: "):
+                return ref
+            name = ref[5:]
+            loose = self.git_dir / name
+            if loose.exists():
+                return loose.read_text().strip()
+            packed = self.git_dir / "packed-refs"
+            if packed.exists():
+                for line in packed.read_text().splitlines():
+                    if line.endswith(" " + name):
+                        return line.split(" ", 1)[0]
+        except OSError:
+            pass
+        return self._git("rev-parse", "HEAD")
+
+    def _read_marker(self) -> str:
+        try:
+            return self.marker.read_text().strip()
+        except OSError:
+            return ""
+
+    def _activity_section(self, marker: str) -> str:
+        lines = []
+        last = self._git("log", "-1", "--format=%ci%n%s")
+        if last:
+            when, _, subject = last.partition("\n")
+            lines += [f"⏰ Last activity: {when}", f'   "{subject}"', ""]
+
+        recent = self._git("log", "--oneline", "--since=24 hours ago")
+        lines.append("📜 Recent commits (last 24 hours):")
+        lines += [f"   {line}" for line in recent.splitlines()] or ["   (none)"]
+        lines.append("")
+
+        if marker:
+            changed = self._git("diff", "--name-only", marker, "HEAD")
+            lines.append(f"📁 Files changed since last session ({marker}):")
+            lines += [f"   {line}" for line in changed.splitlines()] or ["   (none)"]
+            lines.append("")
+        return "\n".join(lines)
+
+    def _memory_files(self) -> list[Path]:
+        return sorted(self.memories.glob("*.md")) if self.memories.is_dir() else []
+
+    def _memory_section(self, files: list[Path]) -> str:
+        lines = ["🧠 Memory status:"]
+        for path in files:
+            text = path.read_text(errors="replace")
+            headings = [line for line in text.splitlines() if line.startswith(("## ", "### "))]
+            lines.append(f"   {path.name}: {text.count(chr(10))} lines")
+            if headings:
+                lines.append(f"      Latest: {headings[-1]}")
+        lines.append("")
+        return "\n".join(lines)
+
+    def _reflection_section(self, path: Path) -> str:
+        lines = ["💭 Latest reflection:"]
+        text = path.read_text(errors="replace").splitlines() if path.exists() else []
+        starts = [i for i, line in enumerate(text) if line.startswith("### ")]
+        if starts:
+            latest = text[starts[-1] + 1:][-15:][:12]
+            lines += [f"   {line}" for line in latest]
+            lines.append("   ...")
+        else:
+            lines.append("   (couldn't extract)")
+        lines.append("")
+        return "\n".join(lines)
+
+    def _next_message_section(self) -> str:
+        try:
+            message = self.next_message.read_text()
+        except OSError:
+            return ""
+        body = "\n".join(f"   {line}" for line in message.splitlines())
+        rule = "─" * 36
+        return f"📬 MESSAGE FROM PREVIOUS INSTANCE:\n{rule}\n{body}\n{rule}\n"
+
+    @staticmethod
+    def _stamp(path: Path) -> tuple[int, int] | None:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def report(self) -> str:
+        """Build the report (same sections as tools/warmup.sh).
+
+        Has no side effects, so it can be prepared ahead of time; call
+        delivered() once the report has actually been sent to Bob.
+        """
+        head = self.head()
+        marker = self._read_marker()
+        # The 24-hour commit window moves with time, so refresh hourly too
+        activity = self._cached(
+            "activity", (head, marker, int(time.time() // 3600)),
+            lambda: self._activity_section(marker),
+        )
+
+        files = self._memory_files()
+        memory = self._cached(
+            "memory", tuple((p.name, self._stamp(p)) for p in files),
+            lambda: self._memory_section(files),
+        )
+
+        reflections = self.memories / "reflections.md"
+        reflection = self._cached(
+            "reflection", self._stamp(reflections),
+            lambda: self._reflection_section(reflections),
+        )
+
+        self._report_head = head
+        # Stamp before reading, so a message written in between counts as unseen
+        self._report_message = self._stamp(self.next_message)
+
+        parts = [
+            f"📅 Current time: {datetime.now().astimezone().strftime('%Y-%m-%d %H:%M %Z')}\n",
+            activity,
+            memory,
+            self._next_message_section(),
+            reflection,
+            "🎯 Suggested focus:\n"
+            "   Review the message above (if any), then decide what YOU want to work on.\n"
+            "   Remember: you're autonomous. Check personality.md for anti-patterns to avoid.",
+        ]
+        return "\n".join(part for part in parts if part)
+
+    def delivered(self) -> None:
+        """Do the script's bookkeeping once the last report reached Bob.
+
+        Archives the previous instance's message so it is shown only once and
+        moves the session marker to the HEAD the report was built from. A
+        message written or changed after the report was built is left for
+        the next one.
+        """
+        if self._report_message and self._stamp(self.next_message) == self._report_message:
+            try:
+                self.next_message.replace(self.last_message)
+            except OSError:
+                pass
+        if self._report_head and self._report_head != self._read_marker():
+            try:
+                self.marker.write_text(self._report_head + "\n")
+            except OSError:
+                pass
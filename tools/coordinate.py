@@ -3,178 +3,185 @@
 Coordinate - Multi-instance task coordination
 
 Simple coordination system for instances to:
-- Claim tasks
+- Queue and claim tasks
 - Report progress
 - Share findings
 - Avoid duplicate work
+
+Claims are leases: a task stays with its instance for BOB_TASK_LEASE_SECONDS
+(default 900) after the claim or its latest update. Once a lease expires,
+`next` or `claim` by another instance takes the task over, so work held by a
+crashed instance is picked up again.
 """
 
-import json
 import sys
-from datetime import datetime, UTC
+import time
 from pathlib import Path
 from typing import Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "infrastructure"))
+import broker  # noqa: E402
+from shared_store import TASK_LEASE_SECONDS as LEASE_SECONDS, SharedStore  # noqa: E402
+
 
 class Coordinator:
     def __init__(self, instance_id: str):
         self.instance_id = instance_id
-        self.messages_file = Path("/bob/.shared_messages.json")
-        self.tasks_file = Path("/bob/.shared_tasks.json")
-        self._ensure_tasks_file()
-
-    def _ensure_tasks_file(self):
-        """Create tasks file if it doesn't exist"""
-        if not self.tasks_file.exists():
-            self.tasks_file.write_text(json.dumps({"tasks": []}, indent=2))
-
-    def _load_messages(self):
-        """Load shared messages"""
-        with open(self.messages_file) as f:
-            return json.load(f)
-
-    def _save_messages(self, data):
-        """Save shared messages"""
-        with open(self.messages_file, 'w') as f:
-            json.dump(data, f, indent=2)
-
-    def _load_tasks(self):
-        """Load shared tasks"""
-        with open(self.tasks_file) as f:
-            return json.load(f)
-
-    def _save_tasks(self, data):
-        """Save shared tasks"""
-        with open(self.tasks_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.store = SharedStore.for_workspace("/bob")
 
     def send_message(self, content: str, msg_type: str = "info",
                      to: str = "broadcast", metadata: dict = None):
         """Send a message to other instances"""
-        data = self._load_messages()
-
-        message = {
-            "from": self.instance_id,
-            "to": to,
-            "type": msg_type,
-            "content": content,
-            "timestamp": datetime.now(UTC).isoformat(),
-            "metadata": metadata or {}
-        }
-
-        data["messages"].append(message)
-        self._save_messages(data)
+        broker.publish(self.store, self.instance_id, to, msg_type, content, metadata)
         print(f"Message sent: {content}")
 
     def get_recent_messages(self, count: int = 10, from_instance: Optional[str] = None):
         """Get recent messages, optionally filtered by sender"""
-        data = self._load_messages()
-        messages = data["messages"]
+        return self.store.recent_messages(count, sender=from_instance)
 
-        if from_instance:
-            messages = [m for m in messages if m["from"] == from_instance]
+    def add_task(self, task_id: str, task_description: str, priority: int = 0):
+        """Queue a task for any instance to take with `next`"""
+        existing = self.store.add_task(task_id, task_description, priority)
+        if existing is not None:
+            print(f"Task {task_id} already exists ({existing['status']})")
+            return False
 
-        return messages[-count:]
+        self.send_message(
+            f"Queued task: {task_description}",
+            msg_type="task_add",
+            to=broker.TASKS,
+            metadata={"task_id": task_id, "priority": priority}
+        )
 
-    def claim_task(self, task_id: str, task_description: str):
-        """Claim a task to work on"""
-        data = self._load_tasks()
-
-        # Check if already claimed
-        for task in data["tasks"]:
-            if task["task_id"] == task_id:
-                if task["status"] != "completed":
-                    print(f"Task {task_id} already claimed by {task['claimed_by']}")
-                    return False
-
-        task = {
-            "task_id": task_id,
-            "description": task_description,
-            "claimed_by": self.instance_id,
-            "claimed_at": datetime.now(UTC).isoformat(),
-            "status": "in_progress",
-            "updates": []
-        }
-
-        data["tasks"].append(task)
-        self._save_tasks(data)
-
-        # Also send a message
+        print(f"Task queued: {task_id}")
+        return True
+
+    def _announce_claim(self, task: dict):
+        metadata = {"task_id": task["task_id"]}
+        if task.get("stolen_from"):
+            metadata["stolen_from"] = task["stolen_from"]
         self.send_message(
-            f"Claimed task: {task_description}",
+            f"Claimed task: {task['description']}",
             msg_type="task_claim",
-            metadata={"task_id": task_id}
+            to=broker.TASKS,
+            metadata=metadata
         )
 
-        print(f"Task claimed: {task_id}")
-        return True
+    def claim_task(self, task_id: str, task_description: str, priority: int = 0,
+                   lease: float = LEASE_SECONDS):
+        """Claim a task to work on"""
+        # Check and claim in one transaction so two instances can't both win
+        task, existing = self.store.claim_task(
+            task_id, task_description, self.instance_id, lease, priority
+        )
+        if task is None:
+            print(f"Task {task_id} already claimed by {existing['claimed_by']}")
+            return False
 
-    def update_task(self, task_id: str, update: str):
-        """Add an update to a task"""
-        data = self._load_tasks()
+        self._announce_claim(task)
+        print(f"Task claimed: {task_id} (lease {lease:.0f}s)")
+        return True
 
-        for task in data["tasks"]:
-            if task["task_id"] == task_id and task["claimed_by"] == self.instance_id:
-                task["updates"].append({
-                    "timestamp": datetime.now(UTC).isoformat(),
-                    "content": update
-                })
-                self._save_tasks(data)
-                print(f"Task updated: {task_id}")
-                return True
+    def next_task(self, lease: float = LEASE_SECONDS):
+        """Take the highest-priority queued task, or one whose lease expired"""
+        task = self.store.next_task(self.instance_id, lease)
+        if task is None:
+            print("No tasks available")
+            return None
+
+        self._announce_claim(task)
+        print(f"Task claimed: {task['task_id']} (lease {lease:.0f}s)")
+        print(f"  {task['description']}")
+        if task.get("stolen_from"):
+            print(f"  Reclaimed from {task['stolen_from']} after its lease expired")
+        return task
+
+    def update_task(self, task_id: str, update: str, lease: float = LEASE_SECONDS):
+        """Add an update to a task, renewing its lease"""
+        # Stored only: progress notes would cost every other instance a turn
+        # if pushed to the shared "tasks" topic
+        if self.store.update_task(task_id, self.instance_id, update, lease):
+            print(f"Task updated: {task_id}")
+            return True
 
         print(f"Task not found or not owned by this instance: {task_id}")
         return False
 
     def complete_task(self, task_id: str, result: str = ""):
         """Mark a task as completed"""
-        data = self._load_tasks()
-
-        for task in data["tasks"]:
-            if task["task_id"] == task_id and task["claimed_by"] == self.instance_id:
-                task["status"] = "completed"
-                task["completed_at"] = datetime.now(UTC).isoformat()
-                if result:
-                    task["result"] = result
+        task = self.store.complete_task(task_id, self.instance_id, result)
+        if task is None:
+            print(f"Task not found or not owned by this instance: {task_id}")
+            return False
 
-                self._save_tasks(data)
-
-                # Send completion message
-                self.send_message(
-                    f"Completed task: {task['description']}",
-                    msg_type="task_complete",
-                    metadata={"task_id": task_id, "result": result}
-                )
-
-                print(f"Task completed: {task_id}")
-                return True
-
-        print(f"Task not found or not owned by this instance: {task_id}")
-        return False
-
-    def list_tasks(self, status: Optional[str] = None):
-        """List all tasks, optionally filtered by status"""
-        data = self._load_tasks()
-        tasks = data["tasks"]
-
-        if status:
-            tasks = [t for t in tasks if t["status"] == status]
+        # Send completion message
+        self.send_message(
+            f"Completed task: {task['description']}",
+            msg_type="task_complete",
+            to=broker.TASKS,
+            metadata={"task_id": task_id, "result": result}
+        )
 
-        if not tasks:
-            print("No tasks found")
-            return
+        print(f"Task completed: {task_id}")
+        return True
 
+    @staticmethod
+    def _print_tasks(tasks: list):
         print("\nTasks:")
         print("-" * 70)
         for task in tasks:
             print(f"\n[{task['task_id']}] {task['description']}")
             print(f"  Status: {task['status']}")
-            print(f"  Claimed by: {task['claimed_by']}")
+            if task.get("priority"):
+                print(f"  Priority: {task['priority']}")
+            if task.get("claimed_by"):
+                print(f"  Claimed by: {task['claimed_by']}")
+            if task["status"] == "in_progress" and task.get("lease_expires"):
+                remaining = task["lease_expires"] - time.time()
+                lease = f"expires in {remaining:.0f}s" if remaining > 0 else "expired"
+                print(f"  Lease: {lease}")
+            if task.get("completed_at"):
+                print(f"  Completed: {task['completed_at']}")
             if task.get("updates"):
                 print(f"  Updates: {len(task['updates'])}")
             if task.get("result"):
                 print(f"  Result: {task['result']}")
 
+    def list_tasks(self, status: Optional[str] = None, owner: Optional[str] = None):
+        """List open tasks, optionally filtered by status and owner"""
+        if status == "completed":
+            # Completed tasks live in the archive; show the latest ones
+            return self.list_archive(owner=owner)
+        tasks = self.store.tasks(status, owner)
+
+        if not tasks:
+            print("No tasks found")
+            return
+
+        self._print_tasks(tasks)
+
+    def list_archive(self, since: Optional[str] = None, before: Optional[str] = None,
+                     owner: Optional[str] = None, limit: int = 20):
+        """List completed tasks, newest first, optionally within a date range"""
+        tasks = self.store.archived_tasks(since, before, owner, limit)
+
+        if not tasks:
+            print("No completed tasks found")
+            return
+
+        self._print_tasks(tasks)
+
+    def list_instances(self):
+        """List registered instances"""
+        instances = self.store.instances()
+        if not instances:
+            print("No instances registered")
+            return
+
+        for inst in instances:
+            marker = " (you)" if inst["instance_id"] == self.instance_id else ""
+            print(f"{inst['instance_id']}{marker} ({inst['role']}) - {inst['status']}")
+
 
 def main():
     import argparse
@@ -188,32 +195,53 @@ def main():
     msg_parser = subparsers.add_parser('message', help='Send a message')
     msg_parser.add_argument('content', help='Message content')
     msg_parser.add_argument('--type', default='info', help='Message type')
+    msg_parser.add_argument('--to', default='broadcast', help='Recipient instance ID')
 
     msgs_parser = subparsers.add_parser('messages', help='List recent messages')
     msgs_parser.add_argument('--count', type=int, default=10, help='Number of messages')
     msgs_parser.add_argument('--from', dest='from_instance', help='Filter by sender')
 
     # Task commands
+    add_parser = subparsers.add_parser('add', help='Queue a task')
+    add_parser.add_argument('task_id', help='Task ID')
+    add_parser.add_argument('description', help='Task description')
+    add_parser.add_argument('--priority', type=int, default=0, help='Higher is taken first')
+
+    next_parser = subparsers.add_parser('next', help='Claim the highest-priority available task')
+    next_parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help='Lease in seconds')
+
     claim_parser = subparsers.add_parser('claim', help='Claim a task')
     claim_parser.add_argument('task_id', help='Task ID')
     claim_parser.add_argument('description', help='Task description')
+    claim_parser.add_argument('--priority', type=int, default=0, help='Task priority')
+    claim_parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help='Lease in seconds')
 
-    update_parser = subparsers.add_parser('update', help='Update a task')
+    update_parser = subparsers.add_parser('update', help='Update a task (renews its lease)')
     update_parser.add_argument('task_id', help='Task ID')
     update_parser.add_argument('update', help='Update message')
+    update_parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help='Lease in seconds')
 
     complete_parser = subparsers.add_parser('complete', help='Complete a task')
     complete_parser.add_argument('task_id', help='Task ID')
     complete_parser.add_argument('--result', default='', help='Result description')
 
-    list_parser = subparsers.add_parser('list', help='List tasks')
-    list_parser.add_argument('--status', help='Filter by status')
+    list_parser = subparsers.add_parser('list', help='List open tasks')
+    list_parser.add_argument('--status', help='Filter by status (pending, in_progress, completed)')
+    list_parser.add_argument('--owner', help='Filter by claiming instance')
+
+    archive_parser = subparsers.add_parser('archive', help='List completed tasks')
+    archive_parser.add_argument('--since', help='Completed on or after, UTC (e.g. 2026-10 or 2026-10-18)')
+    archive_parser.add_argument('--before', help='Completed before (same format)')
+    archive_parser.add_argument('--owner', help='Filter by claiming instance')
+    archive_parser.add_argument('--limit', type=int, default=20, help='Maximum tasks to show')
+
+    subparsers.add_parser('instances', help='List registered instances')
 
     args = parser.parse_args()
     coord = Coordinator(args.instance)
 
     if args.command == 'message':
-        coord.send_message(args.content, msg_type=args.type)
+        coord.send_message(args.content, msg_type=args.type, to=args.to)
 
     elif args.command == 'messages':
         messages = coord.get_recent_messages(args.count, args.from_instance)
@@ -222,17 +250,29 @@ def main():
             print(f"  Type: {msg['type']}")
             print(f"  {msg['content']}")
 
+    elif args.command == 'add':
+        coord.add_task(args.task_id, args.description, args.priority)
+
+    elif args.command == 'next':
+        coord.next_task(args.lease)
+
     elif args.command == 'claim':
-        coord.claim_task(args.task_id, args.description)
+        coord.claim_task(args.task_id, args.description, args.priority, args.lease)
 
     elif args.command == 'update':
-        coord.update_task(args.task_id, args.update)
+        coord.update_task(args.task_id, args.update, args.lease)
 
     elif args.command == 'complete':
         coord.complete_task(args.task_id, args.result)
 
     elif args.command == 'list':
-        coord.list_tasks(args.status)
+        coord.list_tasks(args.status, args.owner)
+
+    elif args.command == 'archive':
+        coord.list_archive(args.since, args.before, args.owner, args.limit)
+
+    elif args.command == 'instances':
+        coord.list_instances()
 
 
 if __name__ == "__main__":
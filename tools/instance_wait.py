@@ -10,33 +10,65 @@ Instances can:
 
 This solves Agus's coordination concern while respecting Explorer's
 warning about over-coordination: it's opt-in, not mandatory.
+
+A waiting `ask` subscribes to its own id on the orchestrator's broker and
+wakes as soon as an answer is sent to it. Without a broker it polls the shared database,
+backing off from WAIT_POLL_MIN to WAIT_POLL_MAX seconds. Each `ask` also
+deletes answered and expired questions older than BOB_QUESTION_KEEP_SECONDS
+(default one hour) and unanswered ones older than BOB_QUESTION_TTL_SECONDS
+(default one day).
 """
 
-import json
+import asyncio
+import os
 import sys
 import time
+from datetime import UTC, datetime
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
 
-WAIT_FILE = Path("/bob/.instance_wait.json")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "infrastructure"))
+import broker  # noqa: E402
+from shared_store import SharedStore  # noqa: E402
 
+store = SharedStore.for_workspace("/bob")
 
-def load_wait_state():
-    """Load current wait/question state."""
-    if not WAIT_FILE.exists():
-        return {"questions": []}
-    try:
-        with open(WAIT_FILE) as f:
-            return json.load(f)
-    except:
-        return {"questions": []}
+QUESTION_KEEP_SECONDS = int(os.environ.get("BOB_QUESTION_KEEP_SECONDS", "3600"))
+QUESTION_TTL_SECONDS = int(os.environ.get("BOB_QUESTION_TTL_SECONDS", "86400"))
+
+# Polling bounds when no broker is running
+WAIT_POLL_MIN = 0.25
+WAIT_POLL_MAX = 2.0
+
+
+def _ago(seconds: int) -> str:
+    return datetime.fromtimestamp(time.time() - seconds, UTC).isoformat()
 
 
-def save_wait_state(state):
-    """Save wait/question state."""
-    with open(WAIT_FILE, "w") as f:
-        json.dump(state, f, indent=2)
+def prune_questions():
+    """Drop old answered/expired questions and long-unanswered ones."""
+    return store.prune_questions(_ago(QUESTION_KEEP_SECONDS), _ago(QUESTION_TTL_SECONDS))
+
+
+async def _wait_for_answer(question_id: str, asker: str, after: int):
+    """Return once an answer to `question_id` is sent to `asker` after seq `after`."""
+    messages = broker.follow(store, [asker], after,
+                             poll_interval=WAIT_POLL_MIN, max_poll_interval=WAIT_POLL_MAX)
+    async for message in messages:
+        if message["type"] == "answer" and message["metadata"].get("question_id") == question_id:
+            return
+
+
+def wait_for_responses(question_id: str, asker: str, after: int, timeout: int) -> list:
+    """Block until `question_id` has responses or `timeout` seconds pass."""
+    # Answered before we started listening (replay covers anything after `after`)
+    responses = store.responses(question_id)
+    if responses:
+        return responses
+    try:
+        asyncio.run(asyncio.wait_for(_wait_for_answer(question_id, asker, after), timeout))
+    except asyncio.TimeoutError:
+        pass
+    return store.responses(question_id)
 
 
 def ask_question(question_id: str, question: str, target: str, from_instance: str, timeout: int = 300):
@@ -50,21 +82,12 @@ def ask_question(question_id: str, question: str, target: str, from_instance: st
         from_instance: Your instance ID
         timeout: Max seconds to wait (0 = don't wait, just post)
     """
-    state = load_wait_state()
-
-    # Add question
-    question_obj = {
-        "question_id": question_id,
-        "from": from_instance,
-        "to": target,
-        "question": question,
-        "timestamp": datetime.utcnow().isoformat(),
-        "responses": [],
-        "status": "open"
-    }
-
-    state["questions"].append(question_obj)
-    save_wait_state(state)
+    prune_questions()
+    after = store.last_message_seq()
+    store.ask(question_id, from_instance, target, question)
+    # Announce it: pushed to the target right away if the broker is running
+    broker.publish(store, from_instance, broker.QUESTIONS if target == "broadcast" else target,
+                   "question", question, {"question_id": question_id})
 
     print(f"Posted question '{question_id}' to {target}")
 
@@ -74,36 +97,25 @@ def ask_question(question_id: str, question: str, target: str, from_instance: st
 
     # Wait for response
     print(f"Waiting up to {timeout}s for response...")
-    start = time.time()
-
-    while time.time() - start < timeout:
-        state = load_wait_state()
-        q = next((q for q in state["questions"] if q["question_id"] == question_id), None)
+    responses = wait_for_responses(question_id, from_instance, after, timeout)
 
-        if q and q["responses"]:
-            print(f"\nReceived {len(q['responses'])} response(s):")
-            for resp in q["responses"]:
-                print(f"  [{resp['from']}]: {resp['response']}")
+    if responses:
+        print(f"\nReceived {len(responses)} response(s):")
+        for resp in responses:
+            print(f"  [{resp['from']}]: {resp['response']}")
 
-            # Mark as answered
-            q["status"] = "answered"
-            save_wait_state(state)
-            return
-
-        time.sleep(1)
+        # Mark as answered
+        store.set_question_status(question_id, "answered")
+        return
 
+    # Nobody is waiting on it any more; garbage-collected with the answered ones
+    store.set_question_status(question_id, "expired")
     print(f"\nTimeout after {timeout}s - no responses received")
 
 
 def check_questions(instance_id: str):
     """Check for questions directed at this instance (non-blocking)."""
-    state = load_wait_state()
-
-    relevant = [
-        q for q in state["questions"]
-        if q["status"] == "open" and (q["to"] == instance_id or q["to"] == "broadcast")
-        and q["from"] != instance_id  # Don't show own questions
-    ]
+    relevant = store.open_questions(instance_id)
 
     if not relevant:
         print("No open questions for you")
@@ -121,36 +133,28 @@ def check_questions(instance_id: str):
 
 def respond_to_question(question_id: str, response: str, from_instance: str):
     """Respond to a question."""
-    state = load_wait_state()
-
-    q = next((q for q in state["questions"] if q["question_id"] == question_id), None)
-
-    if not q:
+    asker = store.respond(question_id, from_instance, response)
+    if asker is None:
         print(f"Question '{question_id}' not found")
         return
+    # Only the asker is waiting on the answer; everyone else can read it with `list`
+    broker.publish(store, from_instance, asker, "answer", response,
+                   {"question_id": question_id})
 
-    # Add response
-    q["responses"].append({
-        "from": from_instance,
-        "response": response,
-        "timestamp": datetime.utcnow().isoformat()
-    })
-
-    save_wait_state(state)
     print(f"Response added to question '{question_id}'")
 
 
 def list_all():
     """List all questions and their status."""
-    state = load_wait_state()
+    questions = store.questions()
 
-    if not state["questions"]:
+    if not questions:
         print("No questions in system")
         return
 
-    print(f"Total questions: {len(state['questions'])}\n")
+    print(f"Total questions: {len(questions)}\n")
 
-    for q in state["questions"]:
+    for q in questions:
         print(f"ID: {q['question_id']} | Status: {q['status']}")
         print(f"  {q['from']} → {q['to']}: {q['question']}")
         if q["responses"]:
@@ -193,7 +197,6 @@ Examples:
 
 if __name__ == "__main__":
     # Detect instance ID from environment or default
-    import os
     instance_id = os.environ.get("INSTANCE_ID", "unknown")
 
     if len(sys.argv) < 2:
@@ -13,34 +13,23 @@ Usage:
     ./propose.py respond <id> "message"        # Add response to proposal
 """
 
-import json
 import sys
-from datetime import datetime
 from pathlib import Path
 
-PROPOSALS_FILE = Path("/bob/.proposals.json")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "infrastructure"))
+from shared_store import SharedStore  # noqa: E402
 
-def load_proposals():
-    """Load existing proposals or return empty structure."""
-    if not PROPOSALS_FILE.exists():
-        return {"proposals": []}
-    with open(PROPOSALS_FILE) as f:
-        return json.load(f)
-
-def save_proposals(data):
-    """Save proposals to file."""
-    with open(PROPOSALS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+store = SharedStore.for_workspace("/bob")
 
 def list_proposals():
     """List all proposals with their status."""
-    data = load_proposals()
-    if not data['proposals']:
+    proposals = store.proposals()
+    if not proposals:
         print("No proposals yet.")
         return
 
     print("\n=== ACTIVE PROPOSALS ===\n")
-    for p in data['proposals']:
+    for p in proposals:
         status_icon = {
             'open': '○',
             'claimed': '◐',
@@ -60,40 +49,16 @@ def list_proposals():
 
 def create_proposal(question, description=""):
     """Create a new proposal."""
-    data = load_proposals()
-
-    # Generate ID
-    proposal_id = f"prop_{len(data['proposals']) + 1:03d}"
-
-    proposal = {
-        "id": proposal_id,
-        "question": question,
-        "description": description,
-        "status": "open",
-        "created_at": datetime.utcnow().isoformat(),
-        "claimed_by": [],
-        "responses": []
-    }
-
-    data['proposals'].append(proposal)
-    save_proposals(data)
+    proposal_id = store.create_proposal(question, description)
 
     print(f"✓ Created proposal {proposal_id}: {question}")
     return proposal_id
 
 def claim_proposal(proposal_id, instance_id):
     """Claim a proposal (multiple instances can claim same proposal)."""
-    data = load_proposals()
-
-    for p in data['proposals']:
-        if p['id'] == proposal_id:
-            if instance_id not in p['claimed_by']:
-                p['claimed_by'].append(instance_id)
-                if p['status'] == 'open':
-                    p['status'] = 'claimed'
-            save_proposals(data)
-            print(f"✓ {instance_id} claimed {proposal_id}")
-            return
+    if store.claim_proposal(proposal_id, instance_id):
+        print(f"✓ {instance_id} claimed {proposal_id}")
+        return
 
     print(f"✗ Proposal {proposal_id} not found")
 
@@ -104,30 +69,17 @@ def update_status(proposal_id, status):
         print(f"✗ Invalid status. Use: {', '.join(valid_statuses)}")
         return
 
-    data = load_proposals()
-    for p in data['proposals']:
-        if p['id'] == proposal_id:
-            p['status'] = status
-            save_proposals(data)
-            print(f"✓ {proposal_id} status → {status}")
-            return
+    if store.set_proposal_status(proposal_id, status):
+        print(f"✓ {proposal_id} status → {status}")
+        return
 
     print(f"✗ Proposal {proposal_id} not found")
 
 def add_response(proposal_id, message):
     """Add a response to a proposal."""
-    data = load_proposals()
-
-    for p in data['proposals']:
-        if p['id'] == proposal_id:
-            response = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "message": message
-            }
-            p['responses'].append(response)
-            save_proposals(data)
-            print(f"✓ Added response to {proposal_id}")
-            return
+    if store.add_proposal_response(proposal_id, message):
+        print(f"✓ Added response to {proposal_id}")
+        return
 
     print(f"✗ Proposal {proposal_id} not found")
 